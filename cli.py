@@ -0,0 +1,217 @@
+import time
+
+_START = time.perf_counter()
+
+import argparse
+import os
+import sys
+
+# Single command-line entry point for the RHF, optimization, sensitivity, STO fit and isosurface tools.
+#
+# Heavy dependencies are imported inside the subcommand that needs them: pytessel only for isosurfaces,
+# scipy only for optimize and sto-fit, matplotlib only when sto-fit plots. Use --timing to report the
+# startup time (from the start of this module up to the first calculation) and the heavy modules loaded.
+
+HEAVY_MODULES = ['numpy', 'scipy', 'pyqint', 'pytessel', 'matplotlib']
+
+
+class _Timer:
+    """
+    Keeps track of startup and total time of a command.
+    """
+
+    def __init__(self):
+        self.startup = None
+
+    def ready(self):
+        """
+        Mark the end of startup (imports, argument parsing); call right before the first calculation.
+        """
+
+        if self.startup is None:
+            self.startup = time.perf_counter() - _START
+
+    def report(self):
+        """
+        Print startup time, total time and the heavy modules that were loaded to stderr.
+        """
+
+        total = time.perf_counter() - _START
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        print(f"Startup: {self.startup:.3f} s, total: {total:.3f} s, loaded: {', '.join(loaded) or 'none'}",
+              file=sys.stderr)
+
+
+def cmd_rhf(args, timer):
+    """
+    Perform an RHF calculation and print total and orbital energies.
+    """
+
+    from main import run_rhf
+
+    timer.ready()
+    run_rhf(args.molecule, args.set_name, args.results_db, args.eri_threshold, args.prune_threshold)
+
+
+def cmd_isosurfaces(args, timer):
+    """
+    Perform an RHF calculation and write PLY isosurfaces for every molecular orbital.
+    """
+
+    from main import build_isosurfaces, run_rhf
+
+    timer.ready()
+    result_hf = run_rhf(args.molecule, args.set_name, args.results_db, args.eri_threshold, args.prune_threshold)
+    build_isosurfaces(args.molecule, result_hf['cgfs'], result_hf['orbc'], args.isovalue)
+
+
+def cmd_optimize(args, timer):
+    """
+    Optimize shells of a basis set with Nelder-Mead or differential evolution.
+    """
+
+    from optimize import optimize
+
+    workers = args.workers
+    if args.work_queue:
+        from workqueue import WorkQueue
+        workers = WorkQueue(host=args.host, port=args.port)
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'optimize.py')
+        workers.spawn_local_workers(args.local_workers, script)
+        workers.wait_for_workers(1)
+
+    timer.ready()
+    try:
+        optimize(args.method, args.molecule, start_set=args.start_set, set_name=args.set_name, shells=args.shells,
+                 bounds_c=args.coefficient_bounds, bounds_a=args.exponent_bounds, popsize=args.popsize,
+                 maxiter=args.maxiter, seed=args.seed, workers=workers, eri_threshold=args.eri_threshold,
+                 results_db=args.results_db)
+    finally:
+        if args.work_queue:
+            workers.close()
+
+
+def cmd_sensitivity(args, timer):
+    """
+    Rank the shells of a basis set by the energy gain expected from optimizing them.
+    """
+
+    from sensitivity import shell_sensitivity
+
+    timer.ready()
+    energy, ranking = shell_sensitivity(args.molecule, args.set_name, shells=args.shells, step=args.step,
+                                        trust=args.trust, workers=args.workers, results_db=args.results_db,
+                                        eri_threshold=args.eri_threshold, noise=args.noise)
+
+    print(f"Total energy: {energy} Hartrees")
+    print(f"{'Shell':8} {'Expected gain (Ha)':>20} {'|gradient|':>12} {'h <= 0':>7} {'noise':>6}")
+    for entry in ranking:
+        print(f"{entry['label']:8} {entry['expected_gain']:20.6e} {entry['gradient_norm']:12.4e} "
+              f"{entry['negative_curvature']:7d} {entry['below_noise']:6d}")
+
+
+def cmd_sto_fit(args, timer):
+    """
+    Fit contracted Gaussians to a Slater type orbital.
+    """
+
+    import numpy as np
+    from optimizedGaussianCoefficientsPlot import optimize_gaussians
+
+    timer.ready()
+    l, m, n = args.lmn
+    r = np.linspace(0, args.rmax, args.npoints)
+    print(optimize_gaussians(args.orbital, args.primitives, args.zeta, l, m, n, r, plot=not args.no_plot))
+
+
+def build_parser():
+    """
+    Build the argument parser with one subparser per command.
+    """
+
+    parser = argparse.ArgumentParser(description="Hartree-Fock basis set optimization tools")
+    parser.add_argument('--timing', action='store_true', help="report startup time and loaded modules on stderr")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    # Options shared by commands that run RHF calculations for a stored basis set
+    basis_options = argparse.ArgumentParser(add_help=False)
+    basis_options.add_argument('--molecule', default='CO', choices=['CO', 'CH4'])
+    basis_options.add_argument('--set-name', default='STO-3G')
+    basis_options.add_argument('--results-db', default=None,
+                               help="read the basis set from this results store instead of basissets.json")
+    basis_options.add_argument('--eri-threshold', type=float, default=1e-10)
+
+    rhf_options = argparse.ArgumentParser(add_help=False, parents=[basis_options])
+    rhf_options.add_argument('--prune-threshold', type=float, default=1e-6)
+    rhf_options.add_argument('--no-screening', dest='eri_threshold', action='store_const', const=None,
+                             help="use pyqint's unscreened HF().rhf instead of the screened RHF")
+
+    rhf = subparsers.add_parser('rhf', parents=[rhf_options], help="RHF energies for a basis set")
+    rhf.set_defaults(func=cmd_rhf)
+
+    isosurfaces = subparsers.add_parser('isosurfaces', parents=[rhf_options],
+                                        help="RHF calculation and PLY isosurfaces of the molecular orbitals")
+    isosurfaces.add_argument('--isovalue', type=float, default=0.1)
+    isosurfaces.set_defaults(func=cmd_isosurfaces)
+
+    opt = subparsers.add_parser('optimize', help="optimize basis set shells with Nelder-Mead or DE")
+    opt.add_argument('method', choices=['nm', 'de'])
+    opt.add_argument('--molecule', default='CO', choices=['CO', 'CH4'])
+    opt.add_argument('--start-set', default='STO-3G', help="basis set in basissets.json to start from")
+    opt.add_argument('--set-name', default=None, help="name under which the result is stored")
+    opt.add_argument('--shells', type=int, nargs='+', default=None, help="indices of the shells to optimize")
+    opt.add_argument('--coefficient-bounds', type=float, nargs=2, default=None, metavar=('LOW', 'HIGH'))
+    opt.add_argument('--exponent-bounds', type=float, nargs=2, default=None, metavar=('LOW', 'HIGH'))
+    opt.add_argument('--popsize', type=int, default=15)
+    opt.add_argument('--maxiter', type=int, default=1000)
+    opt.add_argument('--seed', type=int, default=None)
+    opt.add_argument('--workers', type=int, default=-1, help="local DE worker processes (-1: all cores)")
+    opt.add_argument('--work-queue', action='store_true', help="dispatch DE evaluations through a TCP work queue")
+    opt.add_argument('--local-workers', type=int, default=4, help="work queue workers started on this host")
+    opt.add_argument('--host', default='127.0.0.1',
+                     help="address the work queue listens on; other than localhost requires WORKQUEUE_AUTHKEY")
+    opt.add_argument('--port', type=int, default=5078, help="port the work queue listens on")
+    opt.add_argument('--eri-threshold', type=float, default=1e-10)
+    opt.add_argument('--results-db', default=None)
+    opt.set_defaults(func=cmd_optimize)
+
+    sensitivity = subparsers.add_parser('sensitivity', parents=[basis_options],
+                                        help="rank shells by the energy gain expected from optimizing them")
+    sensitivity.add_argument('--shells', type=int, nargs='+', default=None, help="indices of the shells to analyse")
+    sensitivity.add_argument('--step', type=float, default=1e-3, help="relative finite difference step")
+    sensitivity.add_argument('--noise', type=float, default=1e-8,
+                             help="energy differences (Ha) below which a parameter is reported as noise")
+    sensitivity.add_argument('--trust', type=float, default=0.1, help="relative trust region for the expected gain")
+    sensitivity.add_argument('--workers', type=int, default=-1, help="worker processes (-1: all cores, 1: serial)")
+    sensitivity.set_defaults(func=cmd_sensitivity)
+
+    sto_fit = subparsers.add_parser('sto-fit', help="fit contracted Gaussians to a Slater type orbital")
+    sto_fit.add_argument('orbital', choices=['1S', '2S', '2P'])
+    sto_fit.add_argument('--zeta', type=float, required=True, help="Slater exponent, e.g. 1.72 for C 2s/2p")
+    sto_fit.add_argument('--primitives', type=int, default=3)
+    sto_fit.add_argument('--lmn', type=int, nargs=3, default=[0, 0, 0], metavar=('L', 'M', 'N'))
+    sto_fit.add_argument('--rmax', type=float, default=6.0)
+    sto_fit.add_argument('--npoints', type=int, default=1000)
+    sto_fit.add_argument('--no-plot', action='store_true', help="skip plotting (matplotlib is not loaded)")
+    sto_fit.set_defaults(func=cmd_sto_fit)
+
+    return parser
+
+
+def main():
+    """
+    Parse the command line and run the selected command.
+    """
+
+    args = build_parser().parse_args()
+    timer = _Timer()
+    try:
+        args.func(args, timer)
+    finally:
+        if args.timing:
+            timer.ready()
+            timer.report()
+
+
+if __name__ == '__main__':
+    main()
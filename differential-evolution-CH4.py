@@ -1,6 +1,9 @@
+import time
 import numpy as np
 from pyqint import HF, MoleculeBuilder, cgf
 from scipy.optimize import differential_evolution
+from workqueue import WorkQueue
+from resultstore import ResultStore
 
 
 def createCGFs(p_C, p_H1, p_H2, p_H3, p_H4, CH4_c, CH4_a):
@@ -72,6 +75,8 @@ def objective_function(params, p_C, p_H1, p_H2, p_H3, p_H4, CH4_c, CH4_a, mol_ch
 
 
 def main():
+    set_name = 'DE-CH42s2p-3G'    # Name under which the optimized basis set is stored in the results store
+
     mol_ch4 = MoleculeBuilder().from_name('CH4')
 
     # Define atom positions
@@ -113,11 +118,25 @@ def main():
 
     bounds_all = bounds_c + bounds_a + bounds_c + bounds_a + bounds_c + bounds_a + bounds_c + bounds_a + bounds_c + bounds_a + bounds_c + bounds_a# For both C2p, C2s, H1s x4
 
-    # Perform optimization using differential evolution with custom initialization
-    result = differential_evolution(
-        objective_function,
-        bounds=bounds_all,
-        args=(p_C, p_H1, p_H2, p_H3, p_H4, CH4_c, CH4_a, mol_ch4),
+    # Evaluation backend
+    # workers = -1 uses all cores of this machine
+    # Set use_work_queue to dispatch evaluations over TCP to workers started on this host.
+    # To add workers on other hosts, set work_queue_host = '0.0.0.0', export the same WORKQUEUE_AUTHKEY here
+    # and on every worker host, and start the workers with:
+    #   python workqueue.py differential-evolution-CH4.py --host <this host> --port 5078
+    use_work_queue = False
+    n_local_workers = 4     # Workers started on this host when using the work queue
+    work_queue_host = '127.0.0.1'   # Address the work queue listens on
+    seed = None             # Set an integer for a reproducible run (independent of the number of workers)
+
+    workers = -1
+    if use_work_queue:
+        workers = WorkQueue(host=work_queue_host)
+        workers.spawn_local_workers(n_local_workers, __file__)
+        workers.wait_for_workers(1)
+
+    # Differential evolution settings
+    settings = dict(
         strategy='best1bin',
         maxiter=1000,
         popsize=24,
@@ -125,13 +144,39 @@ def main():
         mutation=(0.1, 1.2),
         recombination=0.7,
         updating='deferred',
-        workers=-1,
+        seed=seed,
+    )
+
+    # Perform optimization using differential evolution with custom initialization
+    start = time.perf_counter()
+    result = differential_evolution(
+        objective_function,
+        bounds=bounds_all,
+        args=(p_C, p_H1, p_H2, p_H3, p_H4, CH4_c, CH4_a, mol_ch4),
+        workers=workers,
         disp=True,
+        **settings,
     )
+    wall_time = time.perf_counter() - start
+
+    if use_work_queue:
+        workers.close()
 
     print(f"Optimized coefficients and exponents:\n {result.x}")
     print(f"Minimum energy: {result.fun} Hartrees")
 
+    # Store the optimized basis set with its provenance
+    opt_c, opt_a = np.array(CH4_c, dtype=float), np.array(CH4_a, dtype=float)
+    for i, shell in enumerate([1, 2, 3, 4, 5, 6]):
+        opt_c[shell] = result.x[6*i:6*i+3]
+        opt_a[shell] = result.x[6*i+3:6*i+6]
+    positions = {'C': p_C, 'H1': p_H1, 'H2': p_H2, 'H3': p_H3, 'H4': p_H4}
+    record_id = ResultStore().save('CH4', set_name, positions, opt_c, opt_a,
+                                   energy=result.fun, optimizer='differential_evolution',
+                                   settings=dict(settings, bounds=bounds_all), n_evaluations=result.nfev,
+                                   wall_time=wall_time)
+    print(f"Stored as {set_name} (record {record_id})")
+
 
 if __name__ == '__main__':
     main()
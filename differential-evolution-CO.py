@@ -1,6 +1,9 @@
+import time
 import numpy as np
 from pyqint import HF, MoleculeBuilder, cgf
 from scipy.optimize import differential_evolution
+from workqueue import WorkQueue
+from resultstore import ResultStore
 
 
 def createCGFs(p_C, p_O, CO_c, CO_a):
@@ -64,6 +67,8 @@ def objective_function(params, p_C, p_O, CO_c, CO_a, mol_co):
 
 
 def main():
+    set_name = 'DE-CO2s2p-3G'    # Name under which the optimized basis set is stored in the results store
+
     mol_co = MoleculeBuilder().from_name('CO')
 
     # Define atom positions
@@ -100,11 +105,25 @@ def main():
     # For both C2p, C2s, O2p, O2s
     bounds_all = bounds_c + bounds_a + bounds_c + bounds_a + bounds_c + bounds_a + bounds_c + bounds_a
 
-    # Perform optimization using differential evolution with custom initialization
-    result = differential_evolution(
-        objective_function,
-        bounds=bounds_all,
-        args=(p_C, p_O, CO_c, CO_a, mol_co),
+    # Evaluation backend
+    # workers = -1 uses all cores of this machine
+    # Set use_work_queue to dispatch evaluations over TCP to workers started on this host.
+    # To add workers on other hosts, set work_queue_host = '0.0.0.0', export the same WORKQUEUE_AUTHKEY here
+    # and on every worker host, and start the workers with:
+    #   python workqueue.py differential-evolution-CO.py --host <this host> --port 5078
+    use_work_queue = False
+    n_local_workers = 4     # Workers started on this host when using the work queue
+    work_queue_host = '127.0.0.1'   # Address the work queue listens on
+    seed = None             # Set an integer for a reproducible run (independent of the number of workers)
+
+    workers = -1
+    if use_work_queue:
+        workers = WorkQueue(host=work_queue_host)
+        workers.spawn_local_workers(n_local_workers, __file__)
+        workers.wait_for_workers(1)
+
+    # Differential evolution settings
+    settings = dict(
         strategy='best1bin',
         maxiter=1000,
         popsize=15,
@@ -112,14 +131,39 @@ def main():
         mutation=(0.1, 1.2),
         recombination=0.7,
         updating='deferred',
-        workers=-1,
+        seed=seed,
+    )
+
+    # Perform optimization using differential evolution with custom initialization
+    start = time.perf_counter()
+    result = differential_evolution(
+        objective_function,
+        bounds=bounds_all,
+        args=(p_C, p_O, CO_c, CO_a, mol_co),
+        workers=workers,
         disp=True,
+        **settings,
     )
+    wall_time = time.perf_counter() - start
+
+    if use_work_queue:
+        workers.close()
 
 
     print(f"Optimized coefficients and exponents:\n {result.x}")
     print(f"Minimum energy: {result.fun} Hartrees")
 
+    # Store the optimized basis set with its provenance
+    opt_c, opt_a = np.array(CO_c, dtype=float), np.array(CO_a, dtype=float)
+    for i, shell in enumerate([1, 2, 4, 5]):
+        opt_c[shell] = result.x[6*i:6*i+3]
+        opt_a[shell] = result.x[6*i+3:6*i+6]
+    record_id = ResultStore().save('CO', set_name, {'C': p_C, 'O': p_O}, opt_c, opt_a,
+                                   energy=result.fun, optimizer='differential_evolution',
+                                   settings=dict(settings, bounds=bounds_all), n_evaluations=result.nfev,
+                                   wall_time=wall_time)
+    print(f"Stored as {set_name} (record {record_id})")
+
 
 if __name__ == '__main__':
     main()
@@ -1,7 +1,14 @@
 import numpy as np
 from pyqint import HF, PyQInt,  MoleculeBuilder, cgf
-from pytessel import PyTessel
 import json
+from screening import prune_primitives, rhf_screened
+from resultstore import ResultStore
+
+# Shell labels in the order used by createCGFs
+SHELL_LABELS = {
+    'CO': ['C 1s', 'C 2s', 'C 2p', 'O 1s', 'O 2s', 'O 2p'],
+    'CH4': ['C 1s', 'C 2s', 'C 2p', 'H1 1s', 'H2 1s', 'H3 1s', 'H4 1s'],
+}
 
 def main():
     """
@@ -13,28 +20,80 @@ def main():
 
     molecule_name = 'CO'  # Choose between 'CO' or 'CH4'
     set_name = 'STO-3G'   # Choose basis set
+    results_db = None     # Read the basis set from this results store (e.g. 'results.db') instead of basissets.json
+    eri_threshold = 1e-10     # Schwarz screening threshold for two-electron integrals (None: no screening)
+    prune_threshold = 1e-6    # Drop primitives with smaller absolute contraction coefficients (None: no pruning)
+
+    result_hf = run_rhf(molecule_name, set_name, results_db, eri_threshold, prune_threshold)
+
+    build_isosurfaces(molecule_name, result_hf['cgfs'], result_hf['orbc'], 0.1)
+
+
+def run_rhf(molecule_name, set_name, results_db=None, eri_threshold=1e-10, prune_threshold=1e-6):
+    """
+    Perform a Hartree-Fock calculation for a basis set and print the total and orbital energies.
+
+    Parameters:
+    molecule_name (str): The name of the molecule.
+    set_name (str): The name of the basis set.
+    results_db (str): Read the basis set from this results store instead of basissets.json (None: use basissets.json).
+    eri_threshold (float): Schwarz screening threshold for two-electron integrals (None: no screening).
+    prune_threshold (float): Drop primitives with smaller absolute contraction coefficients (None: no pruning).
+
+    Returns:
+    dict: Result of the Hartree-Fock calculation.
+    """
+
+    if results_db is None:
+        positions, coefficients, alphas = read_json('basissets.json', molecule_name, set_name)  # Read JSON file for specified basis set
+    else:
+        positions, coefficients, alphas = ResultStore(results_db).load(molecule_name, set_name)   # Look up only the specified basis set
 
-    positions, coefficients, alphas = read_json('basissets.json', molecule_name, set_name)  # Read JSON file for specified basis set
+    # Drop negligible primitives before building the contracted Gaussian functions
+    if prune_threshold is not None:
+        coefficients, alphas, n_pruned = prune_primitives(coefficients, alphas, prune_threshold)
+        print(f"Pruned primitives: {n_pruned}")
 
     cgfs = createCGFs(positions, coefficients, alphas)  # Create contracted Gaussian functions
 
     mol = MoleculeBuilder().from_name(molecule_name)    # Create molecule object based on specified molecule
     
     # Perform Hartree-Fock calculations
-    result_hf = HF().rhf(mol, cgfs)
-    cgfs_res, orbc_res, energy_res, orbe_res = result_hf['cgfs'], result_hf['orbc'], result_hf['energy'], result_hf['orbe']
+    if eri_threshold is None:
+        result_hf = HF().rhf(mol, cgfs)
+    else:
+        result_hf = rhf_screened(mol, cgfs, eri_threshold)
+        stats = result_hf['screening']
+        print(f"Skipped shell quartets: {stats['shell_quartets_skipped']} of {stats['shell_quartets_total']} "
+              f"({stats['integrals_evaluated']} two-electron integrals evaluated)")
+
+    print(f"Total energy: {result_hf['energy']} Hartrees")
+    print(f"Orbital energies: {result_hf['orbe']} Hartrees")
+
+    return result_hf
+
+
+def build_isosurfaces(molecule_name, cgfs, orbc, isovalue):
+    """
+    Build isosurfaces for all molecular orbitals of a molecule.
 
-    print(f"Total energy: {energy_res} Hartrees")
-    print(f"Orbital energies: {orbe_res} Hartrees")
+    Parameters:
+    molecule_name (str): The name of the molecule.
+    cgfs (list): List of contracted Gaussian functions.
+    orbc (numpy.ndarray): Molecular orbital coefficients, one column per MO.
+    isovalue (float): Isovalue for the isosurfaces.
+
+    Returns:
+    None
+    """
 
-    # Build isosurfaces for molecular orbitals
     if molecule_name == 'CO':
         for i in range(0, 10):  # 10 MOs: 5 AOs each atom
-            build_isosurface(f'co_{i}', cgfs_res, orbc_res[:,i], 0.1)
+            build_isosurface(f'co_{i}', cgfs, orbc[:,i], isovalue)
 
     elif molecule_name == 'CH4':
         for i in range(0, 9):   # 9 MOs: 5 AOs for C and 4 AOs for H4
-            build_isosurface(f'ch4_{i}', cgfs_res, orbc_res[:,i], 0.1)
+            build_isosurface(f'ch4_{i}', cgfs, orbc[:,i], isovalue)
 
     else:
         raise ValueError("Unsupported molecule")
@@ -61,7 +120,8 @@ def build_isosurface(filename, cgfs, coeff, isovalue):
     unitcell = np.diag(np.ones(3) * 10.0)
 
     # Apply marching cubes algorithm to extract isosurface
-    # Write to PLY file
+    # Write to PLY file (pytessel is only imported when isosurfaces are built)
+    from pytessel import PyTessel
     pytessel = PyTessel()
     vertices, normals, indices = pytessel.marching_cubes(scalarfield.flatten(),
                                                          scalarfield.shape,
@@ -1,8 +1,12 @@
+import time
 import numpy as np
 from pyqint import HF, MoleculeBuilder, cgf
 from scipy.optimize import minimize
+from resultstore import ResultStore
 
 def main():
+    set_name = 'NM-CH42s2p-3G'    # Name under which the optimized basis set is stored in the results store
+
     mol_ch4 = MoleculeBuilder().from_name('CH4')
 
     # Define atom positions
@@ -71,10 +75,23 @@ def main():
         
         return result_hf['energy']  # Return the energy as the objective to minimize
 
+    start = time.perf_counter()
     result = minimize(objective_function, initial_guess, method='Nelder-Mead', bounds=bounds_all)
+    wall_time = time.perf_counter() - start
     print(f"Optimized parameters: {result.x}")
     print(f"Minimum energy: {result.fun} Hartrees")
 
+    # Store the optimized basis set with its provenance
+    opt_c, opt_a = np.array(CH4_c, dtype=float), np.array(CH4_a, dtype=float)
+    for i, shell in enumerate([1, 2, 3, 4, 5, 6]):
+        opt_c[shell] = result.x[6*i:6*i+3]
+        opt_a[shell] = result.x[6*i+3:6*i+6]
+    positions = {'C': p_C, 'H1': p_H1, 'H2': p_H2, 'H3': p_H3, 'H4': p_H4}
+    record_id = ResultStore().save('CH4', set_name, positions, opt_c, opt_a,
+                                   energy=result.fun, optimizer='Nelder-Mead', settings={'bounds': bounds_all},
+                                   n_evaluations=result.nfev, wall_time=wall_time)
+    print(f"Stored as {set_name} (record {record_id})")
+
 def createCGFs(p_C, p_H1, p_H2, p_H3, p_H4, CH4_c, CH4_a):
     cgfs = []
     
@@ -1,8 +1,12 @@
+import time
 import numpy as np
 from pyqint import HF, MoleculeBuilder, cgf
 from scipy.optimize import minimize
+from resultstore import ResultStore
 
 def main():
+    set_name = 'NM-CO2s2p-3G'    # Name under which the optimized basis set is stored in the results store
+
     mol_co = MoleculeBuilder().from_name('CO')
 
     # Define atom positions 
@@ -64,11 +68,23 @@ def main():
 
 
 
+    start = time.perf_counter()
     result = minimize(objective_function, initial_guess, method='Nelder-Mead', bounds=bounds_all)
+    wall_time = time.perf_counter() - start
 
     print(f"Optimized parameters: {result.x}")
     print(f"Minimum energy: {result.fun} Hartrees")
 
+    # Store the optimized basis set with its provenance
+    opt_c, opt_a = np.array(CO_c, dtype=float), np.array(CO_a, dtype=float)
+    for i, shell in enumerate([1, 2, 4, 5]):
+        opt_c[shell] = result.x[6*i:6*i+3]
+        opt_a[shell] = result.x[6*i+3:6*i+6]
+    record_id = ResultStore().save('CO', set_name, {'C': p_C, 'O': p_O}, opt_c, opt_a,
+                                   energy=result.fun, optimizer='Nelder-Mead', settings={'bounds': bounds_all},
+                                   n_evaluations=result.nfev, wall_time=wall_time)
+    print(f"Stored as {set_name} (record {record_id})")
+
 def createCGFs(p_C, p_O, CO_c, CO_a):
     cgfs = []
     
@@ -0,0 +1,148 @@
+import time
+import numpy as np
+from pyqint import MoleculeBuilder
+from scipy.optimize import differential_evolution, minimize
+
+from main import createCGFs, read_json
+from resultstore import ResultStore
+from screening import ERI_THRESHOLD, rhf_screened
+
+# Shells optimized by default, as in the optimization scripts
+# CO: C2s, C2p, O2s, O2p; CH4: C2s, C2p, H1s x4
+DEFAULT_SHELLS = {
+    'CO': [1, 2, 4, 5],
+    'CH4': [1, 2, 3, 4, 5, 6],
+}
+
+# Default bounds for coefficients and exponents per method; exponents must stay strictly positive
+DEFAULT_BOUNDS = {
+    'nm': ((-1.0, 1.0), (0.1, 100.0)),
+    'de': ((-0.1, 1.0), (0.1, 135.0)),
+}
+
+
+def set_parameters(params, coefficients, alphas, shells):
+    """
+    Insert a parameter vector into copies of the coefficients and alphas of a basis set.
+
+    The parameter vector holds, for every optimized shell in order, its coefficients followed by its exponents.
+
+    Parameters:
+    params (array): Parameter vector.
+    coefficients (array): Array of coefficients for the Gaussian functions.
+    alphas (array): Array of exponents for the Gaussian functions.
+    shells (list): Indices of the optimized shells.
+
+    Returns:
+    tuple: A tuple containing the updated coefficients (list) and alphas (list).
+    """
+
+    coefficients = [list(shell) for shell in coefficients]
+    alphas = [list(shell) for shell in alphas]
+
+    offset = 0
+    for shell in shells:
+        n = len(coefficients[shell])
+        coefficients[shell] = list(params[offset:offset + n])
+        alphas[shell] = list(params[offset + n:offset + 2 * n])
+        offset += 2 * n
+
+    return coefficients, alphas
+
+
+def get_parameters(coefficients, alphas, shells):
+    """
+    Build the parameter vector of the optimized shells (the inverse of set_parameters).
+    """
+
+    return np.concatenate([np.concatenate([coefficients[shell], alphas[shell]]) for shell in shells])
+
+
+def objective_function(params, positions, coefficients, alphas, shells, mol, eri_threshold=ERI_THRESHOLD):
+    """
+    RHF energy of a basis set with the optimized shells replaced by the parameter vector.
+
+    Raises:
+    ValueError: If an exponent is not positive; pyqint does not return for such exponents.
+    """
+
+    coefficients, alphas = set_parameters(params, coefficients, alphas, shells)
+    if any(alpha <= 0 for shell in alphas for alpha in shell):
+        raise ValueError("Exponents must be positive")
+    cgfs = createCGFs(positions, coefficients, alphas)
+
+    return rhf_screened(mol, cgfs, eri_threshold)['energy']
+
+
+def optimize(method, molecule_name, start_set='STO-3G', set_name=None, shells=None, bounds_c=None, bounds_a=None,
+             popsize=15, maxiter=1000, seed=None, workers=-1, eri_threshold=ERI_THRESHOLD, results_db=None):
+    """
+    Optimize the coefficients and exponents of selected shells and store the result.
+
+    Parameters:
+    method (str): 'nm' for Nelder-Mead or 'de' for differential evolution.
+    molecule_name (str): The name of the molecule.
+    start_set (str): Basis set from basissets.json to start from; shells that are not optimized keep its values.
+    set_name (str): Name under which the result is stored (None: derived from method, molecule and shells).
+    shells (list): Indices of the shells to optimize (None: DEFAULT_SHELLS of the molecule).
+    bounds_c (tuple): Bounds for the coefficients (None: DEFAULT_BOUNDS of the method).
+    bounds_a (tuple): Bounds for the exponents (None: DEFAULT_BOUNDS of the method).
+    popsize (int): Population size multiplier (differential evolution only).
+    maxiter (int): Maximum number of generations or iterations.
+    seed (int): Random seed (differential evolution only).
+    workers (int or callable): Differential evolution workers, e.g. -1 or a WorkQueue.
+    eri_threshold (float): Schwarz screening threshold for two-electron integrals.
+    results_db (str): Path of the results store (None: resultstore.DEFAULT_PATH).
+
+    Returns:
+    OptimizeResult: The result of the optimizer.
+
+    Raises:
+    ValueError: If the method is not 'nm' or 'de', or the lower exponent bound is not positive.
+    """
+
+    if method not in DEFAULT_BOUNDS:
+        raise ValueError(f"Unsupported optimization method {method}")
+
+    shells = DEFAULT_SHELLS[molecule_name] if shells is None else shells
+    bounds_c = DEFAULT_BOUNDS[method][0] if bounds_c is None else bounds_c
+    bounds_a = DEFAULT_BOUNDS[method][1] if bounds_a is None else bounds_a
+    if bounds_a[0] <= 0:
+        raise ValueError("The lower exponent bound must be positive")
+    if set_name is None:
+        set_name = f"{method.upper()}-{molecule_name}-{'-'.join(str(shell) for shell in shells)}"
+
+    positions, coefficients, alphas = read_json('basissets.json', molecule_name, start_set)
+    mol = MoleculeBuilder().from_name(molecule_name)
+
+    bounds_all = []
+    for shell in shells:
+        bounds_all += [tuple(bounds_c)] * len(coefficients[shell]) + [tuple(bounds_a)] * len(alphas[shell])
+    args = (positions, coefficients, alphas, shells, mol, eri_threshold)
+
+    start = time.perf_counter()
+    if method == 'nm':
+        settings = dict(method='Nelder-Mead', options={'maxiter': maxiter})
+        result = minimize(objective_function, get_parameters(coefficients, alphas, shells), args=args,
+                          bounds=bounds_all, **settings)
+    else:
+        settings = dict(strategy='best1bin', maxiter=maxiter, popsize=popsize, tol=1e-6, mutation=(0.1, 1.2),
+                        recombination=0.7, updating='deferred', seed=seed)
+        result = differential_evolution(objective_function, bounds=bounds_all, args=args, workers=workers,
+                                        disp=True, **settings)
+    wall_time = time.perf_counter() - start
+
+    print(f"Optimized coefficients and exponents:\n {result.x}")
+    print(f"Minimum energy: {result.fun} Hartrees")
+
+    # Store the optimized basis set with its provenance
+    opt_c, opt_a = set_parameters(result.x, coefficients, alphas, shells)
+    store = ResultStore() if results_db is None else ResultStore(results_db)
+    record_id = store.save(molecule_name, set_name, positions, opt_c, opt_a, energy=result.fun,
+                           optimizer='Nelder-Mead' if method == 'nm' else 'differential_evolution',
+                           settings=dict(settings, shells=shells, bounds=bounds_all, start_set=start_set,
+                                         eri_threshold=eri_threshold),
+                           n_evaluations=result.nfev, wall_time=wall_time)
+    print(f"Stored as {set_name} (record {record_id})")
+
+    return result
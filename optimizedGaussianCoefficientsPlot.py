@@ -1,7 +1,6 @@
 import numpy as np
 from scipy.optimize import differential_evolution
 from math import factorial
-import matplotlib.pyplot as plt
 
 
 # Change zeta parameter in print (at the bottom) for closest fit to that specific orbital of atom
@@ -20,7 +19,7 @@ import matplotlib.pyplot as plt
 # 2S and 2P orbital: 2.25
 
 
-def optimize_gaussians(orbital, num_primitives, zeta, l, m, n, r):
+def optimize_gaussians(orbital, num_primitives, zeta, l, m, n, r, plot=True):
 
     if orbital == "1S":
         # Calculate STO-1S (target values)
@@ -101,7 +100,11 @@ def optimize_gaussians(orbital, num_primitives, zeta, l, m, n, r):
 
     sto3g = np.sum(primitive_gaussian_array, axis=0)
 
-    # Plot
+    if not plot:
+        return optimized_coeff
+
+    # Plot (matplotlib is only imported when plotting)
+    import matplotlib.pyplot as plt
     # plt.ylim(0, 0.8)
     plt.xlim(left=0, right=6)
     plt.xlabel("r (a.u.)")
@@ -121,4 +124,5 @@ def optimize_gaussians(orbital, num_primitives, zeta, l, m, n, r):
 
     return optimized_coeff
 
-print(optimize_gaussians("2P",3, 1.72, 1, 0, 0, np.linspace(0, 6, 1000)))
\ No newline at end of file
+if __name__ == '__main__':
+    print(optimize_gaussians("2P",3, 1.72, 1, 0, 0, np.linspace(0, 6, 1000)))
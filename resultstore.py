@@ -0,0 +1,283 @@
+import argparse
+import contextlib
+import json
+import re
+import sqlite3
+import time
+
+import numpy as np
+
+# SQLite store for optimized basis sets.
+#
+# Every optimization run appends a record with its provenance (optimizer, settings, number of evaluations,
+# wall time and energy) and the atom positions it was optimized for. Records are indexed on
+# (molecule, set_name); a lookup returns the most recent record for that name without reading any other
+# basis set. Writers use short transactions in WAL mode, so concurrent optimization runs can save into the
+# same database. export_json writes the layout of basissets.json, in the order in which molecules and basis
+# sets were first stored and with one line per position and parameter row, so main.py keeps working and
+# exporting over basissets.json only changes the lines of changed sets (numbers are written in Python's
+# shortest form, so e.g. 0.000000 becomes 0.0 the first time).
+
+DEFAULT_PATH = 'results.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS basis_sets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    molecule TEXT NOT NULL,
+    set_name TEXT NOT NULL,
+    positions TEXT NOT NULL,
+    coefficients TEXT NOT NULL,
+    alphas TEXT NOT NULL,
+    energy REAL,
+    optimizer TEXT,
+    settings TEXT,
+    n_evaluations INTEGER,
+    wall_time REAL,
+    metadata TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS basis_sets_molecule_set_name ON basis_sets (molecule, set_name, id);
+"""
+
+# A JSON array of numbers spread over several lines by json.dumps(indent=4)
+_NUMBER_ROW = re.compile(r'\[\s*(-?[0-9.eE+-]+(?:,\s*-?[0-9.eE+-]+)*)\s*\]')
+
+
+class ResultStore:
+    """
+    Transactional store for optimized basis sets backed by an SQLite database.
+
+    Parameters:
+    path (str): Path of the SQLite database file; it is created if it does not exist.
+    timeout (float): Seconds to wait for a lock held by a concurrent writer.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """
+        Open a connection for a single transaction; one per operation keeps the store safe to use from several
+        threads and processes. The transaction is committed on success and rolled back on an exception.
+        """
+
+        connection = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def save(self, molecule_name, set_name, positions, coefficients, alphas, energy=None, optimizer=None,
+             settings=None, n_evaluations=None, wall_time=None, metadata=None):
+        """
+        Append an optimized basis set with its provenance.
+
+        Parameters:
+        molecule_name (str): The name of the molecule.
+        set_name (str): The name of the basis set.
+        positions (dict): Atom positions keyed by atom name, as in basissets.json; stored with this record only.
+        coefficients (array): Array of coefficients for the Gaussian functions.
+        alphas (array): Array of exponents for the Gaussian functions.
+        energy (float): Total RHF energy in Hartrees.
+        optimizer (str): Name of the optimizer that produced the basis set.
+        settings (dict): Optimizer settings.
+        n_evaluations (int): Number of objective function evaluations.
+        wall_time (float): Wall time of the optimization in seconds.
+        metadata (dict): Extra fields exported alongside the parameters, such as a literature 'source'.
+
+        Returns:
+        int: Id of the new record.
+
+        Raises:
+        ValueError: If coefficients and alphas do not have the same length.
+        """
+
+        if len(coefficients) != len(alphas):
+            raise ValueError("Coefficients and alphas do not have the same length")
+
+        positions = {atom: np.asarray(position, dtype=float).tolist() for atom, position in positions.items()}
+
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            cursor = connection.execute(
+                'INSERT INTO basis_sets (molecule, set_name, positions, coefficients, alphas, energy, optimizer, '
+                'settings, n_evaluations, wall_time, metadata, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (molecule_name, set_name, json.dumps(positions),
+                 json.dumps(np.asarray(coefficients, dtype=float).tolist()),
+                 json.dumps(np.asarray(alphas, dtype=float).tolist()),
+                 None if energy is None else float(energy), optimizer,
+                 json.dumps(settings, default=str) if settings is not None else None,
+                 None if n_evaluations is None else int(n_evaluations),
+                 None if wall_time is None else float(wall_time),
+                 json.dumps(metadata) if metadata else None,
+                 time.time()))
+
+            return cursor.lastrowid
+
+    def load(self, molecule_name, set_name):
+        """
+        Load the most recent record of a basis set for a specified molecule.
+
+        Parameters:
+        molecule_name (str): The name of the molecule.
+        set_name (str): The name of the basis set.
+
+        Returns:
+        tuple: A tuple containing positions (dict), coefficients (list) and alphas (list), as returned by read_json.
+
+        Raises:
+        ValueError: If the molecule or basis set is not found in the store.
+        """
+
+        record = self.record(molecule_name, set_name)
+
+        return record['positions'], record['coefficients'], record['alphas']
+
+    def record(self, molecule_name, set_name):
+        """
+        Load the most recent record of a basis set, including its provenance.
+
+        Returns:
+        dict: The stored fields of the record, with positions, coefficients, alphas, settings and metadata decoded.
+
+        Raises:
+        ValueError: If the molecule or basis set is not found in the store.
+        """
+
+        with self._connect() as connection:
+            connection.row_factory = sqlite3.Row
+            row = connection.execute('SELECT * FROM basis_sets WHERE molecule = ? AND set_name = ? '
+                                     'ORDER BY id DESC LIMIT 1', (molecule_name, set_name)).fetchone()
+            if row is None:
+                raise ValueError(f"Basis set {set_name} not found for molecule {molecule_name}")
+
+        record = dict(row)
+        record['positions'] = json.loads(record['positions'])
+        record['coefficients'] = json.loads(record['coefficients'])
+        record['alphas'] = json.loads(record['alphas'])
+        record['settings'] = json.loads(record['settings']) if record['settings'] is not None else None
+        record['metadata'] = json.loads(record['metadata']) if record['metadata'] is not None else {}
+
+        return record
+
+    def list(self, molecule_name=None):
+        """
+        List the stored records without their parameters.
+
+        Parameters:
+        molecule_name (str): Only list records for this molecule (None: all molecules).
+
+        Returns:
+        list: One dict per record with id, molecule, set_name, energy, optimizer, n_evaluations, wall_time and created_at.
+        """
+
+        query = ('SELECT id, molecule, set_name, energy, optimizer, n_evaluations, wall_time, created_at '
+                 'FROM basis_sets')
+        params = ()
+        if molecule_name is not None:
+            query += ' WHERE molecule = ?'
+            params = (molecule_name,)
+
+        with self._connect() as connection:
+            connection.row_factory = sqlite3.Row
+            return [dict(row) for row in connection.execute(query + ' ORDER BY molecule, set_name, id', params)]
+
+    def import_json(self, filename='basissets.json'):
+        """
+        Import every basis set from a JSON file in the basissets.json layout.
+
+        Returns:
+        int: Number of imported basis sets.
+        """
+
+        with open(filename, 'r') as file:
+            data = json.load(file)
+
+        n_imported = 0
+        for molecule_name, molecule_data in data['molecules'].items():
+            for set_name, basis_set in molecule_data['basis_sets'].items():
+                metadata = {key: value for key, value in basis_set.items()
+                            if key not in ('coefficients', 'alphas', 'energy')}
+                self.save(molecule_name, set_name, molecule_data['positions'], basis_set['coefficients'],
+                          basis_set['alphas'], energy=basis_set.get('energy'), optimizer='imported',
+                          settings={'file': filename}, metadata=metadata)
+                n_imported += 1
+
+        return n_imported
+
+    def export_json(self, filename='basissets.json'):
+        """
+        Export the most recent record of every basis set to a JSON file in the basissets.json layout.
+
+        Molecules and basis sets are written in the order in which they were first stored. basissets.json holds
+        one set of positions per molecule, so the most recent records of a molecule must share their positions.
+
+        Raises:
+        ValueError: If the most recent records of a molecule were stored with different positions.
+        """
+
+        data = {'molecules': {}}
+
+        with self._connect() as connection:
+            rows = connection.execute(
+                'SELECT latest.molecule, latest.set_name, latest.positions, latest.coefficients, latest.alphas, '
+                'latest.energy, latest.metadata FROM basis_sets AS latest JOIN ('
+                'SELECT MIN(id) AS first_id, MAX(id) AS last_id, MIN(MIN(id)) OVER (PARTITION BY molecule) '
+                'AS molecule_id FROM basis_sets GROUP BY molecule, set_name) AS sets ON latest.id = sets.last_id '
+                'ORDER BY sets.molecule_id, sets.first_id').fetchall()
+
+        for molecule_name, set_name, positions, coefficients, alphas, energy, metadata in rows:
+            positions = json.loads(positions)
+            molecule = data['molecules'].setdefault(molecule_name, {'positions': positions, 'basis_sets': {}})
+            if positions != molecule['positions']:
+                raise ValueError(f"Basis set {set_name} of {molecule_name} was stored with other positions than "
+                                 f"the other basis sets of {molecule_name}")
+
+            basis_set = {'coefficients': json.loads(coefficients), 'alphas': json.loads(alphas)}
+            if energy is not None:
+                basis_set['energy'] = energy
+            if metadata is not None:
+                basis_set.update(json.loads(metadata))
+            molecule['basis_sets'][set_name] = basis_set
+
+        # Keep every position and parameter row on one line, as in the hand-written basissets.json
+        text = _NUMBER_ROW.sub(lambda match: '[' + ', '.join(match.group(1).replace(',', ' ').split()) + ']',
+                               json.dumps(data, indent=4, ensure_ascii=False))
+        with open(filename, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+
+
+def main():
+    """
+    Import, export or list the contents of the results store.
+    """
+
+    parser = argparse.ArgumentParser(description="Optimized basis set results store")
+    parser.add_argument('command', choices=['import', 'export', 'list'])
+    parser.add_argument('filename', nargs='?', default='basissets.json', help="JSON file to import from or export to")
+    parser.add_argument('--db', default=DEFAULT_PATH, help="path of the SQLite database")
+    args = parser.parse_args()
+
+    store = ResultStore(args.db)
+
+    if args.command == 'import':
+        print(f"Imported {store.import_json(args.filename)} basis sets from {args.filename}")
+    elif args.command == 'export':
+        store.export_json(args.filename)
+        print(f"Exported basis sets to {args.filename}")
+    else:
+        for record in store.list():
+            print(f"{record['molecule']:5} {record['set_name']:20} {record['energy']} Hartrees "
+                  f"({record['optimizer']}, {record['n_evaluations']} evaluations, {record['wall_time']} s)")
+
+
+if __name__ == '__main__':
+    main()
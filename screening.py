@@ -0,0 +1,400 @@
+import itertools
+import warnings
+
+import numpy as np
+from pyqint import PyQInt
+
+# Default thresholds for the screening layer
+# ERI_THRESHOLD: shell quartets (AB|CD) with Schwarz bound Q_AB * Q_CD below this value are skipped, where Q_AB is the
+# largest sqrt((ij|ij)) over the basis functions i in shell A and j in shell B
+# PRUNE_THRESHOLD: primitives with an absolute contraction coefficient below this value are dropped
+ERI_THRESHOLD = 1e-10
+PRUNE_THRESHOLD = 1e-6
+
+# Default size of an IntegralCache (CGFs, pairs and quartets); an entry takes about 300 bytes
+CACHE_ENTRIES = 250000
+
+# DIIS settings (identical to those used by pyqint's HF class)
+SUBSPACE_LENGTH = 4
+SUBSPACE_START = 1
+
+
+def prune_primitives(coefficients, alphas, threshold=PRUNE_THRESHOLD):
+    """
+    Remove primitives with negligible contraction coefficients from each shell.
+
+    The primitive with the largest absolute coefficient is always kept, so no shell is ever emptied.
+
+    Parameters:
+    coefficients (array): Array of coefficients for the Gaussian functions, one row per shell.
+    alphas (array): Array of exponents for the Gaussian functions, one row per shell.
+    threshold (float): Primitives with abs(coefficient) below this value are dropped.
+
+    Returns:
+    tuple: A tuple containing pruned coefficients (list), pruned alphas (list) and the number of dropped primitives (int).
+    """
+
+    pruned_coefficients = []
+    pruned_alphas = []
+    n_pruned = 0
+
+    for shell_c, shell_a in zip(coefficients, alphas):
+        shell_c = np.asarray(shell_c, dtype=float)
+        shell_a = np.asarray(shell_a, dtype=float)
+
+        keep = np.abs(shell_c) >= threshold
+        keep[np.argmax(np.abs(shell_c))] = True
+
+        pruned_coefficients.append(shell_c[keep].tolist())
+        pruned_alphas.append(shell_a[keep].tolist())
+        n_pruned += int(np.count_nonzero(~keep))
+
+    return pruned_coefficients, pruned_alphas, n_pruned
+
+
+def group_shells(cgfs):
+    """
+    Group contracted Gaussian functions into shells.
+
+    Consecutive CGFs on the same center with the same primitives (coefficients and exponents) and the same
+    angular momentum form one shell, such as the px, py and pz functions of a 2p shell built by createCGFs.
+
+    Parameters:
+    cgfs (list): List of contracted Gaussian functions.
+
+    Returns:
+    list: One list of CGF indices per shell.
+    """
+
+    shells = []
+    previous = None
+    for i, function in enumerate(cgfs):
+        key = (tuple(function.p),
+               tuple((gto.c, gto.alpha) for gto in function.gtos),
+               sum((function.gtos[0].l, function.gtos[0].m, function.gtos[0].n)) if function.gtos else 0)
+        if key == previous:
+            shells[-1].append(i)
+        else:
+            shells.append([i])
+        previous = key
+
+    return shells
+
+
+class IntegralCache:
+    """
+    Cache of one- and two-electron integrals over contracted Gaussian functions, shared between calculations.
+
+    Integrals are stored per pair (S, T, V) and per symmetry-unique quartet (ERI) of CGFs, keyed on the center,
+    coefficients, exponents and angular momentum of the CGFs involved. A trial basis set that only changes some
+    shells therefore reuses every integral that does not involve those shells. The nuclear attraction integrals
+    depend on the nuclei, so a cache must only be used for a single molecule.
+
+    Parameters:
+    max_entries (int): Number of stored CGFs, pairs and quartets above which the cache is emptied before the
+    next calculation.
+    """
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._ids = {}
+        self._pairs = {}
+        self._quartets = {}
+        self._counter = itertools.count()   # ids are never reused, so clearing is safe while others calculate
+
+    def __len__(self):
+        return len(self._ids) + len(self._pairs) + len(self._quartets)
+
+    def ids(self, cgfs):
+        """
+        Return an integer id per CGF; CGFs with identical parameters share the same id.
+        """
+
+        if len(self) > self.max_entries:
+            self._ids.clear()
+            self._pairs.clear()
+            self._quartets.clear()
+
+        ids = []
+        for function in cgfs:
+            key = (tuple(function.p), tuple((gto.c, gto.alpha, gto.l, gto.m, gto.n) for gto in function.gtos))
+            if key not in self._ids:
+                self._ids[key] = next(self._counter)
+            ids.append(self._ids[key])
+
+        return ids
+
+    def pair(self, i, j, compute):
+        """
+        Return the cached value for the pair of CGF ids (i, j), calling compute() and storing its result on a miss.
+        """
+
+        key = (i, j) if i >= j else (j, i)
+        value = self._pairs.get(key)
+        if value is None:
+            value = self._pairs[key] = compute()
+
+        return value
+
+    def quartet(self, i, j, k, l, compute):
+        """
+        Return the cached value for the quartet of CGF ids (ij|kl), calling compute() and storing its result on
+        a miss. The eight permutationally equivalent quartets share one entry.
+
+        Returns:
+        tuple: A tuple containing the value and whether it was taken from the cache (bool).
+        """
+
+        ij = (i, j) if i >= j else (j, i)
+        kl = (k, l) if k >= l else (l, k)
+        key = (ij, kl) if ij >= kl else (kl, ij)
+        value = self._quartets.get(key)
+        if value is not None:
+            return value, True
+        value = self._quartets[key] = compute()
+
+        return value, False
+
+
+def build_screened_integrals(cgfs, nuclei, threshold=ERI_THRESHOLD, cache=None):
+    """
+    Build the one- and two-electron integrals, skipping shell quartets by Cauchy-Schwarz screening.
+
+    For every pair of CGFs (ij) the Schwarz factor Q_ij = sqrt((ij|ij)) is computed first; the factor of a pair
+    of shells (AB) is the largest Q_ij with i in A and j in B. All integrals of the shell quartet (AB|CD) are only
+    evaluated when Q_AB * Q_CD >= threshold, otherwise they are set to zero. Only symmetry-unique shell and CGF
+    quartets are evaluated; the full tensor is filled using the eightfold permutational symmetry. With a cache,
+    integrals over CGFs that occurred in earlier calculations are reused instead of evaluated.
+
+    Parameters:
+    cgfs (list): List of contracted Gaussian functions.
+    nuclei (list): List of nuclei as (position, charge) tuples.
+    threshold (float): Schwarz bound below which a shell quartet is skipped.
+    cache (IntegralCache): Cache of integrals for this molecule (None: evaluate every integral).
+
+    Returns:
+    tuple: A tuple containing S, T, V (numpy.ndarray), the two-electron tensor (numpy.ndarray) and screening statistics (dict).
+    """
+
+    integrator = PyQInt()
+    N = len(cgfs)
+    ids = cache.ids(cgfs) if cache is not None else None
+    n_integrals = 0
+    n_cached = 0
+
+    def one_electron(i, j):
+        return (integrator.overlap(cgfs[i], cgfs[j]),
+                integrator.kinetic(cgfs[i], cgfs[j]),
+                sum(integrator.nuclear(cgfs[i], cgfs[j], nucleus[0], nucleus[1]) for nucleus in nuclei))
+
+    def repulsion(i, j, k, l):
+        nonlocal n_integrals, n_cached
+        if cache is None:
+            n_integrals += 1
+            return integrator.repulsion(cgfs[i], cgfs[j], cgfs[k], cgfs[l])
+        value, cached = cache.quartet(ids[i], ids[j], ids[k], ids[l],
+                                      lambda: integrator.repulsion(cgfs[i], cgfs[j], cgfs[k], cgfs[l]))
+        if cached:
+            n_cached += 1
+        else:
+            n_integrals += 1
+        return value
+
+    # One-electron integrals
+    S = np.zeros((N, N))
+    T = np.zeros((N, N))
+    V = np.zeros((N, N))
+    for i in range(N):
+        for j in range(i + 1):
+            if cache is None:
+                values = one_electron(i, j)
+            else:
+                values = cache.pair(ids[i], ids[j], lambda: one_electron(i, j))
+            S[i, j] = S[j, i] = values[0]
+            T[i, j] = T[j, i] = values[1]
+            V[i, j] = V[j, i] = values[2]
+
+    # Schwarz factors of CGF pairs from the diagonal integrals (ij|ij), and of shell pairs
+    diagonal = {}
+    Q = np.zeros((N, N))
+    for i in range(N):
+        for j in range(i + 1):
+            diagonal[i, j] = repulsion(i, j, i, j)
+            Q[i, j] = Q[j, i] = np.sqrt(abs(diagonal[i, j]))
+
+    shells = group_shells(cgfs)
+    shell_pairs = [(A, B) for A in range(len(shells)) for B in range(A + 1)]
+    Q_shell = {(A, B): Q[np.ix_(shells[A], shells[B])].max() for A, B in shell_pairs}
+
+    # Two-electron integrals over the symmetry-unique shell quartets
+    tetensor = np.zeros((N, N, N, N))
+    n_quartets = 0
+    n_skipped = 0
+    for AB, (A, B) in enumerate(shell_pairs):
+        for CD, (C, D) in enumerate(shell_pairs[:AB + 1]):
+            n_quartets += 1
+            if Q_shell[A, B] * Q_shell[C, D] < threshold:
+                n_skipped += 1
+                continue
+
+            for i in shells[A]:
+                for j in shells[B]:
+                    if A == B and j > i:
+                        continue
+                    for k in shells[C]:
+                        for l in shells[D]:
+                            if C == D and l > k:
+                                continue
+                            if AB == CD and (k, l) > (i, j):
+                                continue
+
+                            if (k, l) == (i, j):
+                                value = diagonal[i, j]
+                            else:
+                                value = repulsion(i, j, k, l)
+                            for a, b in ((i, j), (j, i)):
+                                for c, d in ((k, l), (l, k)):
+                                    tetensor[a, b, c, d] = value
+                                    tetensor[c, d, a, b] = value
+
+    stats = {
+        'eri_threshold': threshold,
+        'shells': len(shells),
+        'shell_quartets_total': n_quartets,
+        'shell_quartets_skipped': n_skipped,
+        'integrals_evaluated': n_integrals,
+        'integrals_cached': n_cached,
+    }
+
+    return S, T, V, tetensor, stats
+
+
+def rhf_screened(mol, cgfs, eri_threshold=ERI_THRESHOLD, itermax=100, tolerance=1e-9, cache=None):
+    """
+    Perform a Restricted Hartree-Fock calculation using Schwarz-screened two-electron integrals.
+
+    Follows the same SCF procedure (including DIIS) as pyqint's HF().rhf, but builds the integrals through
+    build_screened_integrals so negligible shell quartets are never evaluated. The final energy is the
+    variational energy 0.5 * tr(P (H + F(P))) of the final density P, with the Fock matrix rebuilt from P,
+    so it is smooth in the basis set parameters. pyqint evaluates the final density with the Fock matrix of
+    the last iteration instead; that energy is returned as 'energy_pyqint' for comparison with HF().rhf and
+    differs by up to about 1e-5 Ha. A warning is issued when the SCF did not converge within itermax iterations.
+
+    Parameters:
+    mol (Molecule): Molecule object.
+    cgfs (list): List of contracted Gaussian functions.
+    eri_threshold (float): Schwarz bound below which a shell quartet is skipped.
+    itermax (int): Maximum number of SCF iterations.
+    tolerance (float): Energy convergence criterion in Hartrees.
+    cache (IntegralCache): Cache of integrals for this molecule (None: evaluate every integral).
+
+    Returns:
+    dict: Dictionary with 'energy', 'energy_pyqint', 'energies', 'converged', 'orbe', 'orbc', 'cgfs', 'density' and
+    the screening statistics under 'screening'.
+    """
+
+    nuclei = mol.get_nuclei()
+    nelec = mol.get_nelec()
+    N = len(cgfs)
+    occ = np.array([2 if i < nelec // 2 else 0 for i in range(N)])
+
+    S, T, V, tetensor, stats = build_screened_integrals(cgfs, nuclei, eri_threshold, cache)
+    H = T + V
+
+    # Nuclear repulsion
+    nuc_rep = 0.0
+    for i in range(len(nuclei)):
+        for j in range(i + 1, len(nuclei)):
+            r = np.linalg.norm(np.array(nuclei[i][0]) - np.array(nuclei[j][0]))
+            nuc_rep += nuclei[i][1] * nuclei[j][1] / r
+
+    # Canonical orthogonalization
+    s, U = np.linalg.eigh(S)
+    X = U @ np.diag(1.0 / np.sqrt(s))
+
+    P = np.zeros((N, N))
+    energies = []
+    fmats_diis = []
+    evs_diis = []
+    use_diis = True
+    converged = False
+
+    for niter in range(itermax):
+        if niter > SUBSPACE_START and use_diis:
+            try:
+                diis_coeff = _diis_coefficients(evs_diis)
+            except np.linalg.LinAlgError:
+                use_diis = False
+                continue
+
+            F = sum(c * f for c, f in zip(diis_coeff, fmats_diis))
+            e, Cprime = np.linalg.eigh(X.T @ F @ X)
+            C = X @ Cprime
+            P = np.einsum('ik,jk,k->ij', C, C, occ)
+
+        F = H + _two_electron_matrix(tetensor, P)
+
+        orbe, Cprime = np.linalg.eigh(X.T @ F @ X)
+        C = X @ Cprime
+
+        energies.append(0.5 * np.einsum('ij,ji', P, H + F) + nuc_rep)
+
+        if niter <= SUBSPACE_START or not use_diis:
+            P = np.einsum('ik,jk,k->ij', C, C, occ)
+
+        # Store Fock matrices and error vectors for DIIS
+        fmats_diis.append(F)
+        evs_diis.append((F @ P @ S - S @ P @ F).flatten())
+        fmats_diis = fmats_diis[-SUBSPACE_LENGTH:]
+        evs_diis = evs_diis[-SUBSPACE_LENGTH:]
+
+        if niter > 1 and abs(energies[-2] - energies[-1]) < tolerance:
+            converged = True
+            break
+
+    if not converged:
+        warnings.warn(f"SCF did not converge within {itermax} iterations", RuntimeWarning)
+
+    # Final density matrix and its variational energy; pyqint's HF().rhf uses the Fock matrix of the last iteration
+    P = np.einsum('ik,jk,k->ij', C, C, occ)
+    energy_pyqint = 0.5 * np.einsum('ji,ij', P, H + F) + nuc_rep
+    F = H + _two_electron_matrix(tetensor, P)
+    energy = 0.5 * np.einsum('ji,ij', P, H + F) + nuc_rep
+
+    return {
+        'energy': energy,
+        'energy_pyqint': energy_pyqint,
+        'energies': energies,
+        'converged': converged,
+        'orbe': orbe,
+        'orbc': C,
+        'cgfs': cgfs,
+        'density': P,
+        'screening': stats,
+    }
+
+
+def _two_electron_matrix(tetensor, P):
+    """
+    Build the two-electron part G of the Fock matrix (Coulomb minus half exchange) for density matrix P.
+    """
+
+    return np.einsum('ijlk,kl->ij', tetensor, P) - 0.5 * np.einsum('iklj,kl->ij', tetensor, P)
+
+
+def _diis_coefficients(evs_diis):
+    """
+    Solve the DIIS equations for the extrapolation coefficients of the stored Fock matrices.
+    """
+
+    n = len(evs_diis)
+    B = -np.ones((n + 1, n + 1))
+    B[-1, -1] = 0.0
+    for i in range(n):
+        for j in range(i + 1):
+            B[i, j] = B[j, i] = np.dot(evs_diis[i], evs_diis[j])
+
+    rhs = np.zeros(n + 1)
+    rhs[-1] = -1.0
+
+    return np.linalg.solve(B, rhs)[:-1]
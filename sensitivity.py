@@ -0,0 +1,129 @@
+from functools import partial
+from multiprocessing import Pool
+
+import numpy as np
+from pyqint import MoleculeBuilder
+
+from main import SHELL_LABELS, read_json
+from optimize import get_parameters, objective_function
+from resultstore import ResultStore
+from screening import ERI_THRESHOLD
+
+DEFAULT_STEP = 1e-3
+DEFAULT_TRUST = 0.1
+# Energy differences below this level (Hartrees) are not resolved by the SCF (converged to 1e-9 Ha)
+NOISE_LEVEL = 1e-8
+
+
+def _map(func, points, workers):
+    """
+    Evaluate func for every point, in parallel unless workers == 1.
+
+    workers follows differential_evolution: an int number of processes (-1: all cores) or a map-like callable
+    such as a WorkQueue.
+    """
+
+    if callable(workers):
+        return list(workers(func, points))
+    if workers == 1:
+        return [func(point) for point in points]
+    with Pool(None if workers == -1 else workers) as pool:
+        return pool.map(func, points)
+
+
+def _expected_gain(gradient, curvature, radius):
+    """
+    Energy lowering of the diagonal quadratic model per parameter, minimized within abs(d) <= radius.
+    """
+
+    # Newton step where the curvature is positive, otherwise (or when the Newton step is too long) the boundary
+    with np.errstate(divide='ignore', invalid='ignore'):
+        newton = np.where(curvature > 0, np.abs(gradient) / curvature, np.inf)
+    d = np.minimum(newton, radius)
+
+    return np.abs(gradient) * d - 0.5 * curvature * d ** 2
+
+
+def shell_sensitivity(molecule_name, set_name, shells=None, step=DEFAULT_STEP, trust=DEFAULT_TRUST, workers=-1,
+                      results_db=None, eri_threshold=ERI_THRESHOLD, noise=NOISE_LEVEL):
+    """
+    Rank the shells of a basis set by the energy they are expected to gain when optimized.
+
+    The gradient g and the diagonal of the Hessian h of the RHF energy with respect to every coefficient and
+    exponent are calculated by central finite differences, with all displaced energies evaluated in parallel.
+    pyqint offers no analytic derivatives with respect to basis set parameters. The step of parameter x is
+    step * max(abs(x), 1). The expected gain of a shell is the energy lowering predicted by the diagonal
+    quadratic model g * d + h * d**2 / 2, minimized per parameter within a trust region
+    abs(d) <= trust * max(abs(x), 1), and summed over the parameters of the shell. The trust region keeps
+    the estimate finite for parameters with negative curvature (h <= 0), which are also counted. Parameters
+    whose displaced energies differ from the unperturbed energy by less than the noise level in both
+    directions are counted as below noise and do not contribute to the expected gain.
+
+    Parameters:
+    molecule_name (str): The name of the molecule.
+    set_name (str): The name of the basis set.
+    shells (list): Indices of the shells to analyse (None: all shells).
+    step (float): Relative finite difference step.
+    trust (float): Relative trust region for the expected gain.
+    workers (int or callable): Number of processes (-1: all cores, 1: serial) or a map-like callable.
+    results_db (str): Read the basis set from this results store instead of basissets.json (None: use basissets.json).
+    eri_threshold (float): Schwarz screening threshold for two-electron integrals.
+    noise (float): Energy differences in Hartrees below which a parameter is considered unresolved.
+
+    Returns:
+    tuple: A tuple containing the energy of the basis set (float) and a list with one dict per shell
+    (shell, label, gradient, curvature, gradient_norm, expected_gain, negative_curvature, below_noise), sorted by
+    expected gain.
+    """
+
+    if results_db is None:
+        positions, coefficients, alphas = read_json('basissets.json', molecule_name, set_name)
+    else:
+        positions, coefficients, alphas = ResultStore(results_db).load(molecule_name, set_name)
+
+    shells = list(range(len(coefficients))) if shells is None else shells
+    mol = MoleculeBuilder().from_name(molecule_name)
+
+    x0 = get_parameters(coefficients, alphas, shells)
+    steps = step * np.maximum(np.abs(x0), 1.0)
+
+    # Unperturbed point followed by the +h and -h displacement of every parameter
+    points = [x0]
+    for i in range(len(x0)):
+        for sign in (1, -1):
+            x = x0.copy()
+            x[i] += sign * steps[i]
+            points.append(x)
+
+    func = partial(objective_function, positions=positions, coefficients=coefficients, alphas=alphas,
+                   shells=shells, mol=mol, eri_threshold=eri_threshold)
+    energies = np.array(_map(func, points, workers))
+
+    e0 = energies[0]
+    e_plus, e_minus = energies[1::2], energies[2::2]
+    gradient = (e_plus - e_minus) / (2 * steps)
+    curvature = (e_plus - 2 * e0 + e_minus) / steps ** 2
+    resolved = np.maximum(np.abs(e_plus - e0), np.abs(e_minus - e0)) >= noise
+    gain = np.where(resolved, _expected_gain(gradient, curvature, trust * np.maximum(np.abs(x0), 1.0)), 0.0)
+
+    labels = SHELL_LABELS.get(molecule_name, [])
+    ranking = []
+    offset = 0
+    for shell in shells:
+        n = len(coefficients[shell]) + len(alphas[shell])
+        g, h = gradient[offset:offset + n], curvature[offset:offset + n]
+        ranking.append({
+            'shell': shell,
+            'label': labels[shell] if shell < len(labels) else str(shell),
+            'gradient': g.tolist(),
+            'curvature': h.tolist(),
+            'gradient_norm': float(np.linalg.norm(g)),
+            'expected_gain': float(np.sum(gain[offset:offset + n])),
+            'negative_curvature': int(np.count_nonzero(h <= 0)),
+            'below_noise': int(np.count_nonzero(~resolved[offset:offset + n])),
+        })
+        offset += n
+
+    ranking.sort(key=lambda entry: (entry['expected_gain'], entry['gradient_norm']), reverse=True)
+
+    return float(e0), ranking
@@ -0,0 +1,303 @@
+import argparse
+import contextlib
+import json
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# pyqint reports missing optional modules on stdout at import time, which would corrupt the stdio protocol
+with contextlib.redirect_stdout(sys.stderr):
+    from pyqint import MoleculeBuilder
+    from main import SHELL_LABELS, createCGFs
+    from screening import CACHE_ENTRIES, ERI_THRESHOLD, PRUNE_THRESHOLD, IntegralCache, prune_primitives, rhf_screened
+
+# Protocol: one JSON document per line, answered by one JSON document per line.
+# A request is an object
+#   {"id": 1, "molecule": "CO", "set_name": "STO-3G"}
+# or, to evaluate a trial basis set,
+#   {"id": 2, "molecule": "CO", "coefficients": [[...], ...], "alphas": [[...], ...]}
+# A batch is a JSON list of requests and is answered by a list of responses in the same order.
+# Responses carry "id", "energy" and "orbe" (Hartrees), "converged" (false when the SCF reached its iteration
+# limit; such results are not cached) and "cached", or "error", and always "latency" (seconds).
+# Trial basis sets must have one shell per entry of main.SHELL_LABELS, with finite values and positive alphas;
+# other requests are answered with an error before any integrals are evaluated.
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 5077
+CACHE_SIZE = 4096
+
+
+class EnergyEvaluator:
+    """
+    Resident RHF energy evaluator that keeps basis set data, molecules and results in memory.
+
+    The JSON file is parsed once at construction. Molecule objects are built once per molecule and
+    energies are cached per (molecule, coefficients, alphas), so repeated requests are answered without
+    recomputing the integrals or the SCF. Every molecule also has an IntegralCache, so a trial basis set that
+    changes only some shells reuses the integrals over the unchanged shells.
+    """
+
+    def __init__(self, filename='basissets.json', eri_threshold=ERI_THRESHOLD, prune_threshold=PRUNE_THRESHOLD,
+                 cache_size=CACHE_SIZE, integral_cache_entries=CACHE_ENTRIES):
+        with open(filename, 'r') as file:
+            self.data = json.load(file)
+
+        self.eri_threshold = eri_threshold
+        self.prune_threshold = prune_threshold
+        self.cache_size = cache_size
+        self.integral_cache_entries = integral_cache_entries
+
+        self._molecules = {}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def molecule(self, molecule_name):
+        """
+        Return the cached molecule object, atom positions and integral cache for the specified molecule.
+        """
+
+        with self._lock:
+            if molecule_name not in self._molecules:
+                molecule_data = self.data['molecules'].get(molecule_name)
+                if not molecule_data:
+                    raise ValueError(f"Molecule {molecule_name} not found in JSON file")
+                mol = MoleculeBuilder().from_name(molecule_name)
+                self._molecules[molecule_name] = (mol, molecule_data['positions'],
+                                                  IntegralCache(self.integral_cache_entries))
+
+            return self._molecules[molecule_name]
+
+    def validate(self, molecule_name, coefficients, alphas):
+        """
+        Check a trial basis set before any integrals are evaluated.
+
+        Parameters:
+        molecule_name (str): The name of the molecule.
+        coefficients (array): Array of coefficients for the Gaussian functions.
+        alphas (array): Array of exponents for the Gaussian functions.
+
+        Returns:
+        tuple: A tuple containing the coefficients and alphas as tuples of float tuples, one per shell.
+
+        Raises:
+        ValueError: If the molecule is unknown, the number of shells does not match the layout of the molecule,
+        a shell is empty or has different numbers of coefficients and alphas, a value is not finite, or an
+        alpha is not positive.
+        """
+
+        if molecule_name not in SHELL_LABELS:
+            raise ValueError(f"Unsupported molecule {molecule_name}")
+        labels = SHELL_LABELS[molecule_name]
+        if len(coefficients) != len(labels) or len(alphas) != len(labels):
+            raise ValueError(f"{molecule_name} has {len(labels)} shells, got {len(coefficients)} coefficient "
+                             f"and {len(alphas)} alpha shells")
+
+        checked_c, checked_a = [], []
+        for label, shell_c, shell_a in zip(labels, coefficients, alphas):
+            shell_c = np.asarray(shell_c, dtype=float)
+            shell_a = np.asarray(shell_a, dtype=float)
+            if shell_c.ndim != 1 or shell_c.shape != shell_a.shape or shell_c.size == 0:
+                raise ValueError(f"Shell {label} needs equal, non-zero numbers of coefficients and alphas")
+            if not (np.all(np.isfinite(shell_c)) and np.all(np.isfinite(shell_a))):
+                raise ValueError(f"Shell {label} has coefficients or alphas that are not finite")
+            if np.any(shell_a <= 0):
+                raise ValueError(f"Shell {label} has alphas that are not positive")
+            checked_c.append(tuple(shell_c.tolist()))
+            checked_a.append(tuple(shell_a.tolist()))
+
+        return tuple(checked_c), tuple(checked_a)
+
+    def energy(self, molecule_name, coefficients, alphas):
+        """
+        Calculate the RHF energy for a basis set, using the result cache where possible.
+
+        Parameters:
+        molecule_name (str): The name of the molecule.
+        coefficients (array): Array of coefficients for the Gaussian functions.
+        alphas (array): Array of exponents for the Gaussian functions.
+
+        Returns:
+        tuple: A tuple containing the total energy (float), orbital energies (list), whether the SCF converged (bool)
+        and whether it was a cache hit (bool).
+
+        Raises:
+        ValueError: If the basis set is rejected by validate.
+        """
+
+        coefficients, alphas = self.validate(molecule_name, coefficients, alphas)
+        key = (molecule_name, coefficients, alphas)
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                energy, orbe = self._cache[key]
+                return energy, orbe, True, True
+
+        mol, positions, integral_cache = self.molecule(molecule_name)
+        if self.prune_threshold is not None:
+            coefficients, alphas, _ = prune_primitives(coefficients, alphas, self.prune_threshold)
+        cgfs = createCGFs(positions, coefficients, alphas)
+        result_hf = rhf_screened(mol, cgfs, self.eri_threshold, cache=integral_cache)
+        energy, orbe = float(result_hf['energy']), [float(e) for e in result_hf['orbe']]
+        converged = bool(result_hf['converged'])
+
+        # Only converged energies are cached; an unconverged request is recalculated when it is repeated
+        if converged:
+            with self._lock:
+                self._cache[key] = (energy, orbe)
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return energy, orbe, converged, False
+
+    def handle(self, request):
+        """
+        Answer a single request or a batch (list) of requests.
+
+        Parameters:
+        request (dict or list): Decoded JSON request(s).
+
+        Returns:
+        dict or list: Response(s) with energy, orbital energies and latency, or an error message.
+        """
+
+        if isinstance(request, list):
+            return [self.handle(r) for r in request]
+
+        start = time.perf_counter()
+        response = {'id': request.get('id') if isinstance(request, dict) else None}
+
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+
+            molecule_name = request['molecule']
+            if 'set_name' in request:
+                basis_set = self.data['molecules'].get(molecule_name, {}).get('basis_sets', {}).get(request['set_name'])
+                if not basis_set:
+                    raise ValueError(f"Basis set {request['set_name']} not found for molecule {molecule_name}")
+                coefficients, alphas = basis_set['coefficients'], basis_set['alphas']
+            else:
+                coefficients, alphas = request['coefficients'], request['alphas']
+
+            energy, orbe, converged, cached = self.energy(molecule_name, coefficients, alphas)
+            response.update({'energy': energy, 'orbe': orbe, 'converged': converged, 'cached': cached})
+
+        except (KeyError, TypeError, ValueError, IndexError) as error:
+            response['error'] = f"{type(error).__name__}: {error}"
+
+        response['latency'] = time.perf_counter() - start
+
+        return response
+
+    def handle_line(self, line):
+        """
+        Decode a request line, answer it and encode the response as a single line.
+        """
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as error:
+            return json.dumps({'id': None, 'error': f"JSONDecodeError: {error}"})
+
+        return json.dumps(self.handle(request))
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Serve newline-delimited JSON requests for a single client connection.
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.decode('utf-8').strip()
+            if not line:
+                continue
+            self.wfile.write((self.server.evaluator.handle_line(line) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class EvaluationServer(socketserver.ThreadingTCPServer):
+    """
+    Threaded TCP server answering energy requests; each client connection is served in its own thread.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, evaluator, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        super().__init__((host, port), _RequestHandler)
+        self.evaluator = evaluator
+
+
+def evaluate(requests, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """
+    Send a request or batch of requests to a running evaluation server and return the response(s).
+
+    Parameters:
+    requests (dict or list): Request or list of requests (see protocol description at the top of this file).
+    host (str): Host the server listens on.
+    port (int): Port the server listens on.
+
+    Returns:
+    dict or list: Response(s) as returned by EnergyEvaluator.handle.
+    """
+
+    with socket.create_connection((host, port)) as connection:
+        stream = connection.makefile('rw', encoding='utf-8')
+        stream.write(json.dumps(requests) + '\n')
+        stream.flush()
+        return json.loads(stream.readline())
+
+
+def serve_stdio(evaluator):
+    """
+    Answer newline-delimited JSON requests on stdin, writing responses to stdout.
+    """
+
+    stdout = sys.stdout
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        with contextlib.redirect_stdout(sys.stderr):  # keep stray output out of the protocol stream
+            response = evaluator.handle_line(line)
+        stdout.write(response + '\n')
+        stdout.flush()
+
+
+def main():
+    """
+    Start the evaluation server on a local TCP socket or on stdin/stdout.
+    """
+
+    parser = argparse.ArgumentParser(description="Resident RHF energy evaluation server")
+    parser.add_argument('--stdio', action='store_true', help="serve requests on stdin/stdout instead of a socket")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--basissets', default='basissets.json')
+    parser.add_argument('--eri-threshold', type=float, default=ERI_THRESHOLD)
+    parser.add_argument('--prune-threshold', type=float, default=PRUNE_THRESHOLD)
+    args = parser.parse_args()
+
+    evaluator = EnergyEvaluator(args.basissets, args.eri_threshold, args.prune_threshold)
+
+    if args.stdio:
+        serve_stdio(evaluator)
+        return
+
+    with EvaluationServer(evaluator, args.host, args.port) as server:
+        print(f"Serving RHF energies on {args.host}:{args.port}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
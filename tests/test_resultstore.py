@@ -0,0 +1,91 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resultstore import ResultStore
+
+BASISSETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'basissets.json')
+
+POSITIONS = {'C': [0.0, 0.0, -1.290265], 'O': [0.0, 0.0, 0.967698]}
+COEFFICIENTS = [[0.154329, 0.535328, 0.444635]] * 6
+ALPHAS = [[71.616837, 13.045096, 3.530512]] * 6
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / 'results.db'))
+
+
+def test_save_load_round_trip(store):
+    record_id = store.save('CO', 'trial', POSITIONS, COEFFICIENTS, ALPHAS, energy=-111.2, optimizer='Nelder-Mead',
+                           settings={'maxiter': 10}, n_evaluations=42, wall_time=1.5, metadata={'source': 'test'})
+
+    assert store.load('CO', 'trial') == (POSITIONS, COEFFICIENTS, ALPHAS)
+
+    record = store.record('CO', 'trial')
+    assert record['id'] == record_id
+    assert record['energy'] == -111.2
+    assert record['optimizer'] == 'Nelder-Mead'
+    assert record['settings'] == {'maxiter': 10}
+    assert record['n_evaluations'] == 42
+    assert record['metadata'] == {'source': 'test'}
+
+
+def test_load_returns_most_recent_record(store):
+    store.save('CO', 'trial', POSITIONS, COEFFICIENTS, ALPHAS, energy=-111.0)
+    store.save('CO', 'trial', POSITIONS, COEFFICIENTS, ALPHAS, energy=-111.5)
+
+    assert store.record('CO', 'trial')['energy'] == -111.5
+    assert len(store.list('CO')) == 2
+
+
+def test_positions_are_stored_per_record(store):
+    moved = {'C': [0.0, 0.0, -1.3], 'O': [0.0, 0.0, 1.0]}
+    store.save('CO', 'first', POSITIONS, COEFFICIENTS, ALPHAS)
+    store.save('CO', 'second', moved, COEFFICIENTS, ALPHAS)
+
+    assert store.load('CO', 'first')[0] == POSITIONS
+    assert store.load('CO', 'second')[0] == moved
+
+
+def test_missing_basis_set_raises(store):
+    with pytest.raises(ValueError, match="not found"):
+        store.load('CO', 'missing')
+
+
+def test_mismatched_lengths_raise(store):
+    with pytest.raises(ValueError, match="same length"):
+        store.save('CO', 'trial', POSITIONS, COEFFICIENTS, ALPHAS[:5])
+
+
+def test_export_raises_on_mismatched_positions(store, tmp_path):
+    store.save('CO', 'first', POSITIONS, COEFFICIENTS, ALPHAS)
+    store.save('CO', 'second', {'C': [0.0, 0.0, -1.3], 'O': [0.0, 0.0, 1.0]}, COEFFICIENTS, ALPHAS)
+
+    with pytest.raises(ValueError, match="other positions"):
+        store.export_json(str(tmp_path / 'export.json'))
+
+
+def test_import_export_keeps_data_and_order(store, tmp_path):
+    exported = tmp_path / 'export.json'
+    store.import_json(BASISSETS)
+    store.save('CO', 'STO-3G', POSITIONS, COEFFICIENTS, ALPHAS, energy=-1.0)
+    store.export_json(str(exported))
+
+    with open(BASISSETS, 'r', encoding='utf-8') as file:
+        original = json.load(file)
+    with open(exported, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    with open(BASISSETS, 'r', encoding='utf-8') as file:
+        n_lines = len(file.read().strip().splitlines())
+
+    assert list(data['molecules']) == list(original['molecules'])
+    for name, molecule in original['molecules'].items():
+        assert list(data['molecules'][name]['basis_sets']) == list(molecule['basis_sets'])
+    assert data['molecules']['CO']['basis_sets']['STO-3G']['energy'] == -1.0
+    assert data['molecules']['CH4'] == original['molecules']['CH4']
+    assert len(exported.read_text(encoding='utf-8').strip().splitlines()) <= n_lines   # one line per row
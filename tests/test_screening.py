@@ -0,0 +1,88 @@
+import os
+import sys
+import warnings
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyqint import HF, MoleculeBuilder, PyQInt
+
+from main import createCGFs, read_json
+from screening import IntegralCache, build_screened_integrals, group_shells, prune_primitives, rhf_screened
+
+BASISSETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'basissets.json')
+
+
+def basis(molecule_name, set_name='STO-3G'):
+    positions, coefficients, alphas = read_json(BASISSETS, molecule_name, set_name)
+    return positions, coefficients, alphas, MoleculeBuilder().from_name(molecule_name)
+
+
+@pytest.mark.parametrize('molecule_name', ['CO', 'CH4'])
+def test_unscreened_integrals_match_pyqint(molecule_name):
+    positions, coefficients, alphas, mol = basis(molecule_name)
+    cgfs = createCGFs(positions, coefficients, alphas)
+
+    S, T, V, tetensor, stats = build_screened_integrals(cgfs, mol.get_nuclei(), 0)
+    S_ref, T_ref, V_ref, tetensor_ref = PyQInt().build_integrals_openmp(cgfs, mol.get_nuclei())
+
+    np.testing.assert_allclose(S, S_ref, atol=1e-12)
+    np.testing.assert_allclose(T, T_ref, atol=1e-12)
+    np.testing.assert_allclose(V, V_ref, atol=1e-12)
+    np.testing.assert_allclose(tetensor, tetensor_ref, atol=1e-12)
+    assert stats['shell_quartets_skipped'] == 0
+
+
+def test_shells_group_p_functions():
+    positions, coefficients, alphas, _ = basis('CO')
+
+    assert group_shells(createCGFs(positions, coefficients, alphas)) == [[0], [1], [2, 3, 4], [5], [6], [7, 8, 9]]
+
+
+def test_screening_skips_shell_quartets():
+    positions, coefficients, alphas, mol = basis('CO')
+    cgfs = createCGFs(positions, coefficients, alphas)
+
+    *_, tetensor, stats = build_screened_integrals(cgfs, mol.get_nuclei(), 1e-6)
+    *_, tetensor_ref = PyQInt().build_integrals_openmp(cgfs, mol.get_nuclei())
+
+    assert stats['shell_quartets_skipped'] > 0
+    assert np.abs(tetensor - tetensor_ref).max() < 1e-6
+
+
+def test_cache_reuses_integrals_of_unchanged_shells():
+    positions, coefficients, alphas, mol = basis('CO')
+    cache = IntegralCache()
+    build_screened_integrals(createCGFs(positions, coefficients, alphas), mol.get_nuclei(), 0, cache)
+
+    alphas[5] = [alpha * 1.1 for alpha in alphas[5]]
+    cgfs = createCGFs(positions, coefficients, alphas)
+    *_, tetensor, stats = build_screened_integrals(cgfs, mol.get_nuclei(), 0, cache)
+    *_, tetensor_ref = PyQInt().build_integrals_openmp(cgfs, mol.get_nuclei())
+
+    assert stats['integrals_cached'] > 0
+    np.testing.assert_allclose(tetensor, tetensor_ref, atol=1e-12)
+
+
+def test_energy_matches_pyqint():
+    positions, coefficients, alphas, mol = basis('CO')
+    cgfs = createCGFs(positions, coefficients, alphas)
+
+    result = rhf_screened(mol, cgfs, 0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        reference = HF().rhf(mol, cgfs)['energy']
+
+    assert result['converged']
+    assert abs(result['energy'] - reference) < 1e-4
+    assert abs(result['energy_pyqint'] - reference) < 1e-4
+
+
+def test_prune_keeps_largest_primitive():
+    coefficients, alphas, n_pruned = prune_primitives([[1e-8, 0.5, 1e-7], [1e-9]], [[1.0, 2.0, 3.0], [4.0]])
+
+    assert coefficients == [[0.5], [1e-9]]
+    assert alphas == [[2.0], [4.0]]
+    assert n_pruned == 2
@@ -0,0 +1,99 @@
+import math
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from server import EnergyEvaluator
+
+BASISSETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'basissets.json')
+
+
+@pytest.fixture(scope='module')
+def evaluator():
+    return EnergyEvaluator(BASISSETS)
+
+
+def sto3g(evaluator, molecule_name='CO'):
+    basis_set = evaluator.data['molecules'][molecule_name]['basis_sets']['STO-3G']
+    return [list(shell) for shell in basis_set['coefficients']], [list(shell) for shell in basis_set['alphas']]
+
+
+def test_validate_accepts_stored_basis_set(evaluator):
+    coefficients, alphas = sto3g(evaluator)
+
+    checked_c, checked_a = evaluator.validate('CO', coefficients, alphas)
+
+    assert [list(shell) for shell in checked_c] == coefficients
+    assert [list(shell) for shell in checked_a] == alphas
+
+
+@pytest.mark.parametrize('molecule_name, change, message', [
+    ('H2O', lambda c, a: None, "Unsupported molecule"),
+    ('CO', lambda c, a: (c.pop(), a.pop()), "has 6 shells"),
+    ('CO', lambda c, a: a[0].__setitem__(0, -1.0), "not positive"),
+    ('CO', lambda c, a: a[5].__setitem__(2, 0.0), "not positive"),
+    ('CO', lambda c, a: a[1].__setitem__(0, math.nan), "not finite"),
+    ('CO', lambda c, a: c[2].__setitem__(1, math.inf), "not finite"),
+    ('CO', lambda c, a: c[3].append(0.1), "equal, non-zero"),
+    ('CO', lambda c, a: (c.__setitem__(4, []), a.__setitem__(4, [])), "equal, non-zero"),
+    ('CO', lambda c, a: c[0].__setitem__(0, 'x'), "could not convert"),
+])
+def test_validate_rejects_malformed_basis_set(evaluator, molecule_name, change, message):
+    coefficients, alphas = sto3g(evaluator)
+    change(coefficients, alphas)
+
+    with pytest.raises(ValueError, match=message):
+        evaluator.validate(molecule_name, coefficients, alphas)
+
+
+def test_malformed_request_is_answered_without_calculation(evaluator, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("rhf_screened called")
+
+    monkeypatch.setattr(server, 'rhf_screened', fail)
+    coefficients, alphas = sto3g(evaluator)
+    alphas[0][0] = -1.0
+
+    response = evaluator.handle({'id': 7, 'molecule': 'CO', 'coefficients': coefficients, 'alphas': alphas})
+
+    assert response['id'] == 7
+    assert 'not positive' in response['error']
+    assert 'energy' not in response
+
+
+def test_converged_result_is_cached(evaluator):
+    request = {'id': 1, 'molecule': 'CH4', 'set_name': 'STO-3G'}
+
+    first = evaluator.handle(request)
+    second = evaluator.handle(request)
+
+    assert first['converged'] and not first['cached']
+    assert second['converged'] and second['cached']
+    assert second['energy'] == first['energy']
+
+
+def test_unconverged_result_is_not_cached(evaluator, monkeypatch):
+    rhf_screened = server.rhf_screened
+    monkeypatch.setattr(server, 'rhf_screened', lambda *args, **kwargs: dict(rhf_screened(*args, **kwargs),
+                                                                              converged=False))
+    coefficients, alphas = sto3g(evaluator, 'CH4')
+    alphas[3] = [alpha * 1.01 for alpha in alphas[3]]
+    request = {'molecule': 'CH4', 'coefficients': coefficients, 'alphas': alphas}
+
+    first = evaluator.handle(request)
+    second = evaluator.handle(request)
+
+    assert not first['converged'] and not first['cached']
+    assert not second['converged'] and not second['cached']
+
+
+def test_batch_keeps_request_order(evaluator):
+    responses = evaluator.handle([{'id': 1, 'molecule': 'CO', 'set_name': 'missing'},
+                                  {'id': 2, 'molecule': 'CH4', 'set_name': 'STO-3G'}])
+
+    assert [response['id'] for response in responses] == [1, 2]
+    assert 'error' in responses[0] and 'energy' in responses[1]
@@ -0,0 +1,125 @@
+import os
+import pickle
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import workqueue
+from workqueue import WorkQueue, run_worker
+from workqueue_objective import slow_square, square
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workqueue_objective.py')
+
+
+@pytest.fixture
+def work_queue(monkeypatch):
+    monkeypatch.delenv(workqueue.AUTHKEY_ENV, raising=False)
+    queues = []
+
+    def start(n_workers, **kwargs):
+        work_queue = WorkQueue(port=0, **kwargs)
+        queues.append(work_queue)
+        work_queue.spawn_local_workers(n_workers, SCRIPT)
+        work_queue.wait_for_workers(n_workers)
+        return work_queue
+
+    yield start
+
+    for work_queue in queues:
+        work_queue.close()
+
+
+def kill_after(processes, delay):
+    def kill():
+        time.sleep(delay)
+        for process in processes:
+            process.kill()
+
+    thread = threading.Thread(target=kill)
+    thread.start()
+    return thread
+
+
+def test_results_in_input_order(work_queue):
+    queue = work_queue(3)
+
+    assert queue.n_workers == 3
+    assert queue(square, range(50)) == [x * x for x in range(50)]
+    assert queue(square, [3.0, 1.0]) == [9.0, 1.0]
+
+
+def test_lost_worker_tasks_are_retried(work_queue):
+    queue = work_queue(3)
+    killer = kill_after(queue._processes[:1], 0.3)
+
+    assert queue(slow_square, range(60)) == [x * x for x in range(60)]
+    killer.join()
+
+    deadline = time.monotonic() + 5
+    while queue.n_workers != 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert queue.n_workers == 2
+
+
+def test_all_workers_lost_raises(work_queue):
+    queue = work_queue(2, worker_timeout=1.0)
+    killer = kill_after(queue._processes, 0.3)
+
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="No workers connected"):
+        queue(slow_square, range(200))
+    killer.join()
+
+    assert time.monotonic() - start < 10
+    assert queue.n_workers == 0
+
+
+def test_wrong_authkey_is_rejected(work_queue):
+    queue = work_queue(0)
+
+    with pytest.raises(ConnectionError):
+        run_worker(queue.host, queue.port, connect_timeout=5, authkey='wrong key')
+    assert queue.n_workers == 0
+
+
+def test_unauthenticated_payload_is_not_unpickled(work_queue, tmp_path):
+    queue = work_queue(0)
+    marker = tmp_path / 'unpickled'
+    payload = pickle.dumps(type('Exploit', (), {'__reduce__': lambda self: (open, (str(marker), 'w'))})())
+
+    with socket.create_connection((queue.host, queue.port)) as connection:
+        connection.recv(64)
+        connection.sendall(workqueue._HEADER.pack(len(payload)) + payload + bytes(64))
+        connection.settimeout(5)
+        try:
+            assert connection.recv(64) == b''
+        except ConnectionResetError:
+            pass
+
+    assert not marker.exists()
+    assert queue.n_workers == 0
+
+
+def test_remote_host_requires_authkey(monkeypatch):
+    monkeypatch.delenv(workqueue.AUTHKEY_ENV, raising=False)
+
+    with pytest.raises(ValueError, match=workqueue.AUTHKEY_ENV):
+        WorkQueue(host='0.0.0.0', port=0)
+
+
+def test_seeded_differential_evolution_matches_serial(work_queue):
+    from scipy.optimize import differential_evolution, rosen
+
+    queue = work_queue(3)
+    settings = dict(bounds=[(-2, 2)] * 3, seed=1, maxiter=20, popsize=5, polish=False, updating='deferred')
+
+    serial = differential_evolution(rosen, workers=1, **settings)
+    distributed = differential_evolution(rosen, workers=queue, **settings)
+
+    assert distributed.x.tolist() == serial.x.tolist()
+    assert distributed.fun == serial.fun
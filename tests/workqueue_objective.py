@@ -0,0 +1,12 @@
+import time
+
+# Objective functions for the work queue tests; workers import this module from the script directory
+
+
+def square(x):
+    return x * x
+
+
+def slow_square(x):
+    time.sleep(0.05)
+    return x * x
@@ -0,0 +1,484 @@
+import argparse
+import hmac
+import ipaddress
+import os
+import pickle
+import queue
+import runpy
+import secrets
+import select
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+# Minimal TCP work queue used as a map-like `workers` backend for scipy's differential_evolution.
+#
+# The coordinator (WorkQueue) listens on a TCP port. Workers (`python workqueue.py <script>`) connect to it,
+# receive (index, function, parameter vector) tasks and send back the objective value. Results are returned in
+# input order, so a seeded differential evolution run gives the same result for any number of workers.
+# Tasks held by a worker that disconnects or times out are put back on the queue and retried elsewhere.
+#
+# Messages are pickled and length-prefixed. Pickle executes code on load, so nothing is unpickled before both
+# sides proved they know the shared key: an HMAC-SHA256 challenge-response in both directions on raw bytes.
+# The key is taken from the WORKQUEUE_AUTHKEY environment variable; without it a coordinator generates a random
+# key for its local workers and only listens on a loopback address. To accept workers from other hosts, listen
+# on '0.0.0.0' and set the same WORKQUEUE_AUTHKEY for the coordinator and every worker. Messages are not
+# encrypted; use an SSH tunnel on networks you do not trust.
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 5078
+MAX_RETRIES = 3
+WORKER_TIMEOUT = 60.0
+HANDSHAKE_TIMEOUT = 10.0
+AUTHKEY_ENV = 'WORKQUEUE_AUTHKEY'
+
+_HEADER = struct.Struct('!Q')
+_CHALLENGE_SIZE = 32
+
+
+def _send(connection, obj):
+    """
+    Send a pickled, length-prefixed message.
+    """
+
+    payload = pickle.dumps(obj)
+    connection.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(connection, n):
+    """
+    Receive exactly n bytes.
+
+    Raises:
+    ConnectionError: If the connection is closed before n bytes are received.
+    """
+
+    data = bytearray()
+    while len(data) < n:
+        chunk = connection.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        data.extend(chunk)
+
+    return bytes(data)
+
+
+def _recv(connection):
+    """
+    Receive a pickled, length-prefixed message; only call this on an authenticated connection.
+
+    Raises:
+    ConnectionError: If the connection is closed before the full message is received.
+    """
+
+    (length,) = _HEADER.unpack(_recv_exact(connection, _HEADER.size))
+    return pickle.loads(_recv_exact(connection, length))
+
+
+def _digest(authkey, role, challenge):
+    """
+    HMAC-SHA256 of a challenge, prefixed with the role of the answering side so answers cannot be reflected.
+    """
+
+    return hmac.new(authkey, role + challenge, 'sha256').digest()
+
+
+def _authenticate_worker(connection, authkey):
+    """
+    Coordinator side of the handshake: check that the worker knows the key, then prove that we do.
+
+    Raises:
+    ConnectionError: If the worker does not answer the challenge with the right digest.
+    """
+
+    challenge = secrets.token_bytes(_CHALLENGE_SIZE)
+    connection.sendall(challenge)
+    worker_challenge = _recv_exact(connection, _CHALLENGE_SIZE)
+    digest = _recv_exact(connection, _CHALLENGE_SIZE)
+    if not hmac.compare_digest(digest, _digest(authkey, b'worker', challenge)):
+        raise ConnectionError("Worker failed to authenticate")
+    connection.sendall(_digest(authkey, b'coordinator', worker_challenge))
+
+
+def _authenticate_coordinator(connection, authkey):
+    """
+    Worker side of the handshake: prove that we know the key, then check that the coordinator does.
+
+    Raises:
+    ConnectionError: If the coordinator rejects the worker or does not answer with the right digest.
+    """
+
+    challenge = _recv_exact(connection, _CHALLENGE_SIZE)
+    worker_challenge = secrets.token_bytes(_CHALLENGE_SIZE)
+    connection.sendall(worker_challenge + _digest(authkey, b'worker', challenge))
+    try:
+        digest = _recv_exact(connection, _CHALLENGE_SIZE)
+    except ConnectionError:
+        raise ConnectionError("Coordinator rejected the connection; check WORKQUEUE_AUTHKEY") from None
+    if not hmac.compare_digest(digest, _digest(authkey, b'coordinator', worker_challenge)):
+        raise ConnectionError("Coordinator failed to authenticate")
+
+
+def _authkey(authkey=None):
+    """
+    Return the shared key as bytes: the argument if given, else WORKQUEUE_AUTHKEY (None if neither is set).
+    """
+
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_ENV) or None
+    if isinstance(authkey, str):
+        authkey = authkey.encode('utf-8')
+
+    return authkey
+
+
+def _is_loopback(host):
+    """
+    Whether host resolves to a loopback address.
+    """
+
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+class WorkQueue:
+    """
+    Map-like callable that evaluates a function over an iterable on remote workers.
+
+    Pass an instance as `workers=` to differential_evolution. Each call puts every parameter vector of a
+    generation on the queue and blocks until all results have been collected, or fails when no worker has
+    been connected for worker_timeout seconds.
+
+    Parameters:
+    host (str): Address to listen on. Use '0.0.0.0' together with an authkey to accept workers from other hosts.
+    port (int): Port to listen on. Use 0 to pick a free port (see the `port` attribute).
+    max_retries (int): Number of times a task is re-queued after its worker was lost before giving up.
+    task_timeout (float): Seconds a worker may spend on a single task before it is considered lost (None: no limit).
+    authkey (str or bytes): Key shared with the workers (None: WORKQUEUE_AUTHKEY, else a random key for local workers).
+    worker_timeout (float): Seconds a call waits without any connected worker before it fails (None: wait forever).
+
+    Raises:
+    ValueError: If host is not a loopback address and no authkey is given or set in WORKQUEUE_AUTHKEY.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, max_retries=MAX_RETRIES, task_timeout=None,
+                 authkey=None, worker_timeout=WORKER_TIMEOUT):
+        authkey = _authkey(authkey)
+        if authkey is None:
+            if not _is_loopback(host):
+                raise ValueError(f"Listening on {host} accepts workers from other hosts; "
+                                 f"set {AUTHKEY_ENV} (or pass authkey) to a shared secret first")
+            authkey = secrets.token_hex(32).encode('utf-8')
+
+        self.max_retries = max_retries
+        self.task_timeout = task_timeout
+        self.worker_timeout = worker_timeout
+        self._authkey = authkey
+
+        self._tasks = queue.Queue()
+        self._generation = 0
+        self._results = {}
+        self._failure = None
+        self._done = threading.Condition()
+        self._closed = threading.Event()
+        self._workers = []
+        self._n_workers = 0
+        self._processes = []
+
+        self._listener = socket.create_server((host, port))
+        self.host, self.port = self._listener.getsockname()[:2]
+
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self._accept_thread.start()
+
+    def __call__(self, func, iterable):
+        """
+        Evaluate func for every item in iterable on the connected workers.
+
+        Returns:
+        list: Results in the same order as iterable.
+
+        Raises:
+        RuntimeError: If func raised on a worker, a task was lost more than max_retries times, or no worker was
+        connected for worker_timeout seconds while tasks were pending.
+        """
+
+        func_payload = pickle.dumps(func)
+        items = list(iterable)
+
+        with self._done:
+            self._generation += 1
+            self._results = {}
+            self._failure = None
+            generation = self._generation
+
+        for index, item in enumerate(items):
+            self._tasks.put((generation, index, func_payload, item, 0))
+
+        last_seen = time.monotonic()
+        with self._done:
+            while len(self._results) < len(items) and self._failure is None:
+                self._done.wait(timeout=0.5)
+                if self.n_workers > 0:
+                    last_seen = time.monotonic()
+                elif self.worker_timeout is not None and time.monotonic() - last_seen > self.worker_timeout:
+                    self._failure = (f"No workers connected for {self.worker_timeout} s with "
+                                     f"{len(items) - len(self._results)} tasks pending")
+            if self._failure is not None:
+                self._drain()
+                raise RuntimeError(self._failure)
+
+            return [self._results[index] for index in range(len(items))]
+
+    @property
+    def n_workers(self):
+        """
+        Number of currently connected, authenticated workers.
+        """
+
+        return self._n_workers
+
+    def spawn_local_workers(self, n, script):
+        """
+        Start n worker processes on this host connected to this queue; the key is passed in their environment.
+
+        Parameters:
+        n (int): Number of workers to start.
+        script (str): Path of the script defining the objective function.
+
+        Returns:
+        list: The started subprocess.Popen objects.
+        """
+
+        host = '127.0.0.1' if self.host in ('0.0.0.0', '') else self.host
+        env = dict(os.environ, **{AUTHKEY_ENV: self._authkey.decode('utf-8')})
+        processes = [subprocess.Popen([sys.executable, __file__, script, '--host', host, '--port', str(self.port)],
+                                      stdout=subprocess.DEVNULL, env=env)
+                     for _ in range(n)]
+        self._processes.extend(processes)
+
+        return processes
+
+    def wait_for_workers(self, n, timeout=60):
+        """
+        Block until at least n workers are connected.
+
+        Raises:
+        TimeoutError: If fewer than n workers connected within timeout seconds.
+        """
+
+        deadline = time.monotonic() + timeout
+        while self.n_workers < n:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Only {self.n_workers} of {n} workers connected")
+            time.sleep(0.05)
+
+    def close(self):
+        """
+        Stop accepting workers, tell connected workers to exit and stop spawned worker processes.
+        """
+
+        self._closed.set()
+        self._listener.close()
+        for thread in self._workers:
+            thread.join(timeout=5)
+        for process in self._processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _accept(self):
+        """
+        Accept worker connections and serve each in its own thread; the handshake runs in that thread, so a
+        client that never answers does not block other workers.
+        """
+
+        while not self._closed.is_set():
+            try:
+                connection, _ = self._listener.accept()
+            except OSError:
+                break
+            thread = threading.Thread(target=self._serve, args=(connection,), daemon=True)
+            self._workers.append(thread)
+            thread.start()
+
+    def _serve(self, connection):
+        """
+        Authenticate a single worker, then hand out tasks until the queue is closed or the worker is lost.
+        """
+
+        with connection:
+            try:
+                connection.settimeout(HANDSHAKE_TIMEOUT)
+                _authenticate_worker(connection, self._authkey)
+            except (OSError, ConnectionError):
+                return
+            connection.settimeout(self.task_timeout)
+
+            with self._done:
+                self._n_workers += 1
+            try:
+                self._hand_out(connection)
+            finally:
+                with self._done:
+                    self._n_workers -= 1
+
+    def _hand_out(self, connection):
+        """
+        Send tasks to an authenticated worker and collect its results.
+        """
+
+        while not self._closed.is_set():
+            try:
+                task = self._tasks.get(timeout=0.1)
+            except queue.Empty:
+                # An idle worker never sends anything, so a readable connection means it was closed
+                if select.select([connection], [], [], 0)[0]:
+                    return
+                continue
+
+            generation, index, func_payload, item, attempts = task
+            if generation != self._generation:  # left over from a failed call
+                continue
+
+            try:
+                _send(connection, (index, func_payload, item))
+                status, value = _recv(connection)
+            except (OSError, ConnectionError, EOFError, pickle.UnpicklingError):
+                self._retry(task)
+                return
+
+            with self._done:
+                if generation != self._generation:
+                    continue
+                if status == 'ok':
+                    self._results[index] = value
+                else:
+                    self._failure = f"Objective function failed on worker:\n{value}"
+                self._done.notify_all()
+
+        try:
+            _send(connection, None)
+        except OSError:
+            pass
+
+    def _retry(self, task):
+        """
+        Put a task of a lost worker back on the queue, or fail the current call when it ran out of retries.
+        """
+
+        generation, index, func_payload, item, attempts = task
+        if attempts < self.max_retries:
+            self._tasks.put((generation, index, func_payload, item, attempts + 1))
+            return
+
+        with self._done:
+            if generation != self._generation:
+                return
+            self._failure = f"Task {index} lost {attempts + 1} times, giving up"
+            self._done.notify_all()
+
+    def _drain(self):
+        """
+        Discard tasks that are still queued after a failed call.
+        """
+
+        while True:
+            try:
+                self._tasks.get_nowait()
+            except queue.Empty:
+                return
+
+
+def run_worker(host=DEFAULT_HOST, port=DEFAULT_PORT, connect_timeout=60, authkey=None):
+    """
+    Connect to a WorkQueue and evaluate tasks until told to stop.
+
+    Parameters:
+    host (str): Host of the coordinator.
+    port (int): Port of the coordinator.
+    connect_timeout (float): Seconds to keep retrying the initial connection.
+    authkey (str or bytes): Key shared with the coordinator (None: WORKQUEUE_AUTHKEY).
+
+    Raises:
+    ValueError: If no authkey is given or set in WORKQUEUE_AUTHKEY.
+    ConnectionError: If the coordinator and this worker do not share the same key.
+    """
+
+    authkey = _authkey(authkey)
+    if authkey is None:
+        raise ValueError(f"Set {AUTHKEY_ENV} to the key of the coordinator")
+
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            connection = socket.create_connection((host, port))
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+    func_payload, func = None, None
+    with connection:
+        connection.settimeout(HANDSHAKE_TIMEOUT)
+        _authenticate_coordinator(connection, authkey)
+        connection.settimeout(None)
+
+        while True:
+            try:
+                task = _recv(connection)
+            except ConnectionError:
+                return
+            if task is None:
+                return
+
+            index, payload, item = task
+            if payload != func_payload:
+                func_payload, func = payload, pickle.loads(payload)
+
+            try:
+                _send(connection, ('ok', func(item)))
+            except Exception:
+                _send(connection, ('error', traceback.format_exc()))
+
+
+def main():
+    """
+    Start a worker for the objective function defined in a script.
+
+    The script is executed without running its main() so its module-level objective function can be unpickled here.
+    The shared key is read from WORKQUEUE_AUTHKEY.
+    """
+
+    parser = argparse.ArgumentParser(description="Differential evolution work queue worker")
+    parser.add_argument('script', help="script defining the objective function, e.g. differential-evolution-CO.py")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    # The coordinator pickles functions defined in its __main__ module; expose the script's names under ours.
+    # Functions defined in modules next to the script are unpickled by importing them from its directory.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    namespace = runpy.run_path(args.script, run_name='__workqueue__')
+    sys.modules['__main__'].__dict__.update({name: value for name, value in namespace.items()
+                                             if not name.startswith('__')})
+
+    run_worker(args.host, args.port)
+
+
+if __name__ == '__main__':
+    main()